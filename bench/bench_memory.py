@@ -0,0 +1,62 @@
+"""Reports bytes per node for slotted nodes versus __dict__-based equivalents.
+
+Usage: python3 bench/bench_memory.py [count]
+"""
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from html_node import LeafNode, ParentNode  # noqa: E402
+from text_node import TextNode, TextType  # noqa: E402
+
+
+class DictHTMLNode:
+    """The pre-slots layout: every instance carries a __dict__."""
+
+    def __init__(self, tag=None, value=None, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+
+class DictTextNode:
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+
+def bytes_per_node(factory, count: int) -> float:
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    nodes = [factory() for _ in range(count)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del nodes
+
+    return (after - before) / count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    text = "shared text"
+    cases = [
+        ("LeafNode", lambda: DictHTMLNode("b", text), lambda: LeafNode("b", text)),
+        ("ParentNode", lambda: DictHTMLNode("p", None, []), lambda: ParentNode("p", [])),
+        (
+            "TextNode",
+            lambda: DictTextNode(text, TextType.TEXT),
+            lambda: TextNode(text, TextType.TEXT),
+        ),
+    ]
+    print(f"{'node':<12} {'__dict__':>10} {'__slots__':>10}   (bytes per node, {count} nodes)")
+
+    for name, before, after in cases:
+        print(f"{name:<12} {bytes_per_node(before, count):10.1f} {bytes_per_node(after, count):10.1f}")
+
+
+if __name__ == "__main__":
+    main()
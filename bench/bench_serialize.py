@@ -0,0 +1,107 @@
+"""Compares recursive string concatenation with streaming serialization.
+
+Usage: python3 bench/bench_serialize.py [size_mb]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from html_node import LeafNode  # noqa: E402
+from markdown_blocks import markdown_to_html_node  # noqa: E402
+
+SECTION = """## Section {i}
+
+This is **bold** text with an _italic_ word, some `code`, and a [link](/page/{i}).
+It continues on a second line with ![an image](/images/{i}.png) inside.
+
+- first item with **emphasis**
+- second item with a [link](https://example.com/{i})
+- third item
+
+1. one
+2. two
+3. three
+
+> A quote about section {i}
+> spanning two lines
+
+```
+def section_{i}():
+    return {i}
+```
+"""
+
+
+def make_markdown(size_mb: float) -> str:
+    sections = []
+    total = 0
+    i = 0
+
+    while total < size_mb * 1024 * 1024:
+        section = SECTION.format(i=i)
+        sections.append(section)
+        total += len(section)
+        i += 1
+
+    return "# Benchmark\n\n" + "\n".join(sections)
+
+
+def legacy_to_html(node) -> str:
+    """The pre-streaming serializer: recursive `+=` concatenation."""
+    props_html = ""
+    for prop in node.props or {}:
+        props_html += f' {prop}="{node.props[prop]}"'
+    if isinstance(node, LeafNode):
+        if node.tag is None:
+            return node.value
+        return f"<{node.tag}{props_html}>{node.value}</{node.tag}>"
+    children_html = ""
+    for child in node.children:
+        children_html += legacy_to_html(child)
+    return f"<{node.tag}{props_html}>{children_html}</{node.tag}>"
+
+
+def measure(label, func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<24} {elapsed * 1000:9.1f} ms   peak {peak / 1024 / 1024:7.1f} MiB")
+
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 4
+    markdown = make_markdown(size_mb)
+    node = markdown_to_html_node(markdown)
+    assert legacy_to_html(node) == node.to_html()
+    print(f"document: {len(markdown) / 1024 / 1024:.1f} MiB markdown, {len(node.children)} blocks")
+
+    fd, path = tempfile.mkstemp(suffix=".html")
+    os.close(fd)
+
+    def write_legacy():
+        with open(path, "w") as file:
+            file.write(legacy_to_html(node))
+
+    def write_streaming():
+        with open(path, "w") as file:
+            node.write_html(file)
+
+    try:
+        measure("legacy to_html", lambda: legacy_to_html(node))
+        measure("to_html", node.to_html)
+        measure("legacy to file", write_legacy)
+        measure("write_html to file", write_streaming)
+    finally:
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
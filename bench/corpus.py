@@ -0,0 +1,176 @@
+"""Seeded generator for synthetic content trees.
+
+Usage: python3 bench/corpus.py OUT_DIR [--pages N] [--seed S] [--mix paragraph=5,ulist=2,...]
+                                [--link-rate P] [--image-rate P] [--emphasis-rate P]
+"""
+import argparse
+import random
+from pathlib import Path
+
+BLOCK_KINDS = ("paragraph", "heading", "ulist", "olist", "quote", "code")
+DEFAULT_MIX = "paragraph=6,heading=1,ulist=2,olist=1,quote=1,code=1"
+DEFAULT_LINK_RATE = 0.1
+DEFAULT_IMAGE_RATE = 0.02
+DEFAULT_EMPHASIS_RATE = 0.15
+WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+    "incididunt ut labore et dolore magna aliqua ring hobbit shire elf wizard river"
+).split()
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <meta charset="utf-8" />
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+
+
+def parse_mix(mix: str) -> dict[str, int]:
+    weights = {}
+
+    for item in mix.split(","):
+        kind, _, weight = item.partition("=")
+        if kind not in BLOCK_KINDS:
+            raise ValueError(f"unknown block kind: {kind}")
+        weights[kind] = int(weight)
+
+    return weights
+
+
+class CorpusGenerator:
+    """Generates reproducible markdown pages from a seed.
+
+    Attributes:
+        blocks_per_page (int): Number of blocks in each page.
+        link_rate (float): Probability that an inline run becomes a link.
+        image_rate (float): Probability that an inline run becomes an image.
+        emphasis_rate (float): Probability that an inline run becomes bold, italic or code.
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        mix: str = DEFAULT_MIX,
+        blocks_per_page: int = 40,
+        link_rate: float = DEFAULT_LINK_RATE,
+        image_rate: float = DEFAULT_IMAGE_RATE,
+        emphasis_rate: float = DEFAULT_EMPHASIS_RATE,
+    ) -> None:
+        self.random = random.Random(seed)
+        weights = parse_mix(mix)
+        self.kinds = list(weights)
+        self.weights = list(weights.values())
+        self.blocks_per_page = blocks_per_page
+        self.link_rate = link_rate
+        self.image_rate = image_rate
+        self.emphasis_rate = emphasis_rate
+
+    def words(self, count: int) -> str:
+        return " ".join(self.random.choice(WORDS) for _ in range(count))
+
+    def inline(self, runs: int) -> str:
+        parts = []
+
+        for _ in range(runs):
+            roll = self.random.random()
+            text = self.words(self.random.randint(1, 4))
+            if roll < self.link_rate:
+                parts.append(f"[{text}](/pages/{self.random.randint(0, 999)})")
+            elif roll < self.link_rate + self.image_rate:
+                parts.append(f"![{text}](/images/{self.random.randint(0, 99)}.png)")
+            elif roll < self.link_rate + self.image_rate + self.emphasis_rate:
+                delimiter = self.random.choice(("**", "_", "`"))
+                parts.append(f"{delimiter}{text}{delimiter}")
+            else:
+                parts.append(text)
+
+        return " ".join(parts)
+
+    def block(self, kind: str) -> str:
+        if kind == "paragraph":
+            lines = self.random.randint(1, 5)
+            return "\n".join(self.inline(self.random.randint(3, 10)) for _ in range(lines))
+        if kind == "heading":
+            return "#" * self.random.randint(2, 6) + " " + self.inline(2)
+        if kind == "ulist":
+            return "\n".join(f"- {self.inline(3)}" for _ in range(self.random.randint(2, 12)))
+        if kind == "olist":
+            return "\n".join(f"{i}. {self.inline(3)}" for i in range(1, self.random.randint(3, 12)))
+        if kind == "quote":
+            return "\n".join(f"> {self.inline(4)}" for _ in range(self.random.randint(1, 6)))
+        code = "\n".join(f"    line_{i} = {self.words(3)!r}" for i in range(self.random.randint(2, 20)))
+        return f"```\n{code}\n```"
+
+    def page(self, title: str) -> str:
+        kinds = self.random.choices(self.kinds, self.weights, k=self.blocks_per_page)
+        blocks = [f"# {title}"] + [self.block(kind) for kind in kinds]
+
+        return "\n\n".join(blocks) + "\n"
+
+
+def write_corpus(root: Path, pages: int, depth: int = 3, **generator_options) -> list[Path]:
+    """Writes a content tree and template under root.
+
+    Pages are spread over nested directories up to `depth` levels deep.
+
+    Args:
+        root (Path): Directory to create the corpus in.
+        pages (int): Number of pages to generate.
+        depth (int, optional): Maximum directory nesting. Defaults to 3.
+        **generator_options: Passed to CorpusGenerator.
+
+    Returns:
+        list[Path]: The generated markdown files.
+    """
+    generator = CorpusGenerator(**generator_options)
+    content = root / "content"
+    paths = []
+
+    for i in range(pages):
+        nesting = [f"section{generator.random.randint(0, 9)}" for _ in range(generator.random.randint(0, depth))]
+        path = content.joinpath(*nesting, f"page{i}", "index.md")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(generator.page(f"Page {i}"))
+        paths.append(path)
+
+    (root / "template.html").write_text(TEMPLATE)
+
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("out_dir", type=Path)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--blocks", type=int, default=40, help="blocks per page")
+    parser.add_argument("--depth", type=int, default=3, help="maximum directory nesting")
+    parser.add_argument("--link-rate", type=float, default=DEFAULT_LINK_RATE,
+                        help="probability that an inline run is a link (default: %(default)s)")
+    parser.add_argument("--image-rate", type=float, default=DEFAULT_IMAGE_RATE,
+                        help="probability that an inline run is an image (default: %(default)s)")
+    parser.add_argument("--emphasis-rate", type=float, default=DEFAULT_EMPHASIS_RATE,
+                        help="probability that an inline run is bold, italic or code (default: %(default)s)")
+    args = parser.parse_args()
+    paths = write_corpus(
+        args.out_dir,
+        args.pages,
+        args.depth,
+        seed=args.seed,
+        mix=args.mix,
+        blocks_per_page=args.blocks,
+        link_rate=args.link_rate,
+        image_rate=args.image_rate,
+        emphasis_rate=args.emphasis_rate,
+    )
+    print(f"wrote {len(paths)} pages to {args.out_dir / 'content'}")
+
+
+if __name__ == "__main__":
+    main()
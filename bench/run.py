@@ -0,0 +1,166 @@
+"""Times full builds of a synthetic corpus with src/main.py and emits JSON.
+
+Usage:
+    python3 bench/run.py [--pages N] [--seed S] [--build="-j 4"] [--output results.json]
+    python3 bench/run.py --compare baseline.json --threshold 0.15
+
+Each build runs main.py in a fresh process, as a user would: a cold build
+into an empty public/ and .cache/, a warm build with nothing changed, and a
+re-render after the template changes, which renders every page again with
+the previous build's caches in place. A separate --profile build supplies
+per-stage totals. With --compare the run exits non-zero when any build or
+stage is slower than the baseline by more than the threshold, so CI can
+gate on it.
+"""
+import argparse
+import json
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import DEFAULT_EMPHASIS_RATE, DEFAULT_IMAGE_RATE, DEFAULT_LINK_RATE, DEFAULT_MIX, write_corpus  # noqa: E402
+
+MAIN = Path(__file__).resolve().parent.parent / "src" / "main.py"
+BUILDS = ("cold", "warm", "rerender")
+
+
+def run_build(root: Path, build_args: list[str]) -> float:
+    """Runs one build of the site under root and returns its wall-clock time in seconds."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, str(MAIN), *build_args], cwd=root, check=True, stdout=subprocess.DEVNULL)
+
+    return time.perf_counter() - start
+
+
+def clean(root: Path) -> None:
+    for name in ("public", ".cache"):
+        shutil.rmtree(root / name, ignore_errors=True)
+
+
+def time_builds(root: Path, build_args: list[str]) -> dict[str, float]:
+    """Times a cold build, a warm build and a full re-render after a template edit."""
+    clean(root)
+    timings = {"cold": run_build(root, build_args), "warm": run_build(root, build_args)}
+    template = root / "template.html"
+    template.write_text(template.read_text() + "\n")
+    timings["rerender"] = run_build(root, build_args)
+
+    return timings
+
+
+def stage_totals(root: Path, build_args: list[str]) -> dict[str, float]:
+    """Sums the per-stage times of a cold --profile build from its trace."""
+    trace = root / "trace.json"
+    clean(root)
+    run_build(root, [*build_args, "--profile", "--trace", str(trace)])
+    totals = {}
+
+    for event in json.loads(trace.read_text())["traceEvents"]:
+        if event["cat"] == "stage":
+            totals[event["name"]] = totals.get(event["name"], 0.0) + event["dur"] / 1e6
+
+    return totals
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Lists the builds and stages that regressed by more than `threshold` (a fraction)."""
+    regressions = []
+
+    for section in ("builds", "stages"):
+        for name, seconds in results[section].items():
+            before = baseline.get(section, {}).get(name)
+            if before and seconds > before * (1 + threshold):
+                regressions.append(f"{name}: {before:.4f}s -> {seconds:.4f}s (+{seconds / before - 1:.0%})")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--blocks", type=int, default=40, help="blocks per page")
+    parser.add_argument("--link-rate", type=float, default=DEFAULT_LINK_RATE,
+                        help="probability that an inline run is a link (default: %(default)s)")
+    parser.add_argument("--image-rate", type=float, default=DEFAULT_IMAGE_RATE,
+                        help="probability that an inline run is an image (default: %(default)s)")
+    parser.add_argument("--emphasis-rate", type=float, default=DEFAULT_EMPHASIS_RATE,
+                        help="probability that an inline run is bold, italic or code (default: %(default)s)")
+    parser.add_argument("--build", default="", metavar="ARGS",
+                        help='extra arguments for main.py, e.g. "-j 4 --io-threads 2"')
+    parser.add_argument("--repeat", type=int, default=3, help="runs of each build; the fastest is kept")
+    parser.add_argument("--output", type=Path, help="write the JSON results here instead of stdout")
+    parser.add_argument("--compare", type=Path, help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="allowed slowdown per build or stage as a fraction (default: %(default)s)")
+    args = parser.parse_args()
+    build_args = shlex.split(args.build)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        pages = write_corpus(
+            root,
+            args.pages,
+            seed=args.seed,
+            mix=args.mix,
+            blocks_per_page=args.blocks,
+            link_rate=args.link_rate,
+            image_rate=args.image_rate,
+            emphasis_rate=args.emphasis_rate,
+        )
+        (root / "static").mkdir()
+        runs = [time_builds(root, build_args) for _ in range(args.repeat)]
+        stages = stage_totals(root, build_args)
+        corpus_bytes = sum(path.stat().st_size for path in pages)
+
+    builds = {name: min(run[name] for run in runs) for name in BUILDS}
+    results = {
+        "revision": git_revision(),
+        "python": sys.version.split()[0],
+        "corpus": {
+            "pages": args.pages,
+            "seed": args.seed,
+            "mix": args.mix,
+            "link_rate": args.link_rate,
+            "image_rate": args.image_rate,
+            "emphasis_rate": args.emphasis_rate,
+            "bytes": corpus_bytes,
+        },
+        "build_args": build_args,
+        "builds": builds,
+        "stages": stages,
+        "pages_per_second": args.pages / builds["cold"],
+    }
+    text = json.dumps(results, indent=2)
+
+    if args.output:
+        args.output.write_text(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        regressions = compare(results, json.loads(args.compare.read_text()), args.threshold)
+        for regression in regressions:
+            print(f"regression: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
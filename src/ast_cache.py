@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from html_node import LeafNode, ParentNode
+from markdown_blocks import PARSER_VERSION
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_SOURCE_BYTES = 1024 * 1024
+
+
+def node_to_data(node):
+    """Converts a node tree into nested lists for compact serialization.
+
+    Leaves become `[tag, value, props]`, or `[tag, value, props, true]` for raw
+    leaves, and parents `[tag, [children...], props]`.
+
+    Args:
+        node (LeafNode | ParentNode): The root of the tree.
+
+    Raises:
+        TypeError: If the tree contains another kind of node.
+
+    Returns:
+        list: The serializable form of the tree.
+    """
+    if isinstance(node, LeafNode):
+        data = [node.tag, node.value, dict(node.props) if node.props is not None else None]
+        if node.raw:
+            data.append(True)
+        return data
+    if isinstance(node, ParentNode):
+        return [node.tag, [node_to_data(child) for child in node.children], node.props]
+
+    raise TypeError(f"cannot serialize node: {node!r}")
+
+
+def data_to_node(data):
+    """Rebuilds a node tree from the output of node_to_data.
+
+    Args:
+        data (list): The serialized tree.
+
+    Returns:
+        LeafNode | ParentNode: The root of the rebuilt tree.
+    """
+    tag, value, props = data[:3]
+
+    if isinstance(value, list):
+        return ParentNode(tag, [data_to_node(child) for child in value], props)
+
+    return LeafNode(tag, value, props, len(data) > 3)
+
+
+class AstCache:
+    """On-disk cache of parsed markdown trees keyed by source hash and parser version.
+
+    Reads refresh an entry's mtime, and trim() evicts the least recently used
+    entries once the cache grows past its size cap.
+
+    Attributes:
+        cache_dir (Path): Directory holding one JSON file per cached tree.
+        max_bytes (int): Size the cache is trimmed down to.
+        max_source_bytes (int): Largest markdown source whose tree is cached.
+    """
+
+    def __init__(
+        self, cache_dir: Path, max_bytes: int = DEFAULT_MAX_BYTES, max_source_bytes: int = DEFAULT_MAX_SOURCE_BYTES
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_source_bytes = max_source_bytes
+
+    def accepts(self, source_size: int) -> bool:
+        """Checks whether a source is small enough to have its tree cached.
+
+        Larger pages are streamed instead, so rendering them never holds
+        the whole source or tree in memory.
+
+        Args:
+            source_size (int): Size of the markdown source in bytes.
+
+        Returns:
+            bool: True if the page should go through the cache.
+        """
+        return source_size <= self.max_source_bytes
+
+    def _entry_path(self, source_hash: str) -> Path:
+        key = hashlib.sha256(f"{PARSER_VERSION}:{source_hash}".encode()).hexdigest()
+
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, source_hash: str) -> ParentNode | None:
+        """Returns the cached tree for a markdown source, if any.
+
+        Args:
+            source_hash (str): Hash of the markdown source.
+
+        Returns:
+            ParentNode | None: The cached tree, or None on a miss.
+        """
+        path = self._entry_path(source_hash)
+
+        try:
+            with open(path, "r") as entry_file:
+                data = json.load(entry_file)
+            os.utime(path)
+        except (OSError, ValueError):
+            return None
+
+        return data_to_node(data)
+
+    def put(self, source_hash: str, node: ParentNode) -> None:
+        """Stores the parsed tree for a markdown source.
+
+        Args:
+            source_hash (str): Hash of the markdown source.
+            node (ParentNode): The parsed tree.
+        """
+        path = self._entry_path(source_hash)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(node_to_data(node), separators=(",", ":")))
+        tmp_path.replace(path)
+
+    def trim(self) -> int:
+        """Evicts least recently used entries until the cache fits its size cap.
+
+        Returns:
+            int: The number of entries removed.
+        """
+        if not self.cache_dir.is_dir():
+            return 0
+        entries = []
+        total = 0
+
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(".json"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.unlink(path)
+            total -= size
+            removed += 1
+
+        return removed
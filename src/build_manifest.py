@@ -0,0 +1,356 @@
+import hashlib
+import json
+from pathlib import Path
+
+MANIFEST_VERSION = 2
+# Bump whenever the same sources, templates and options start rendering to
+# different HTML, e.g. a change to parsing, escaping, highlighting, template
+# compilation or minification, so existing sites re-render every page.
+RENDER_VERSION = 3
+
+
+def hash_bytes(data: bytes) -> str:
+    """Returns the hex SHA-256 digest of a byte string.
+
+    Args:
+        data (bytes): The bytes to hash.
+
+    Returns:
+        str: The hex digest.
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path: Path) -> str:
+    """Returns the hex SHA-256 digest of a file's contents.
+
+    Args:
+        path (Path): The file to hash.
+
+    Returns:
+        str: The hex digest.
+    """
+    digest = hashlib.sha256()
+
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 16), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def stat_digest(path: Path, previous: list | None = None, checksum: bool = False) -> list:
+    """Returns a file's [size, mtime_ns, digest], reusing `previous` if size and mtime match.
+
+    Args:
+        path (Path): The file.
+        previous (list | None, optional): What this returned for the file last time.
+        checksum (bool, optional): Hash the file even if size and mtime match.
+
+    Returns:
+        list: The size, modification time and hex digest.
+    """
+    stat = path.stat()
+    stat_key = [stat.st_size, stat.st_mtime_ns]
+
+    if not checksum and isinstance(previous, list) and previous[:2] == stat_key:
+        return previous
+
+    return stat_key + [hash_file(path)]
+
+
+class BuildManifest:
+    """Records the inputs of the previous build so unchanged pages can be skipped.
+
+    A page is fresh when its source hash, the template hash, the base path
+    and RENDER_VERSION all match what was recorded when its output was last
+    written, and that output still exists.
+
+    Attributes:
+        path (Path): Where the manifest is stored.
+        template_hash (str): Hash of the template used for this build.
+        base_path (str): Base path used for this build.
+        pages (dict[str, dict]): Entries recorded during this build, keyed by source path.
+        static_files (dict[str, str]): Where each file from the static directory was
+            copied to, both relative to their directories (see sync_static).
+        assets (dict[str, str]): Fingerprinted asset URLs pages were rendered with.
+        images (dict[str, dict] | None): Image sizes and variants pages were rendered
+            with, or None if images were not processed.
+        image_digests (dict[str, list]): Size, mtime and hash of each image with
+            variants (see collect_images).
+        minify (bool): Whether pages were rendered with a minified template.
+        compressed (dict): Levels and hashes of the files given .gz and .br
+            siblings (see precompress).
+    """
+
+    def __init__(self, path: Path, template_hash: str, base_path: str) -> None:
+        self.path = path
+        self.template_hash = template_hash
+        self.base_path = str(base_path)
+        self.pages = {}
+        self.previous_pages = {}
+        previous = self._load()
+
+        if (
+            previous.get("template") == self.template_hash
+            and previous.get("base_path") == self.base_path
+            and previous.get("render_version") == RENDER_VERSION
+        ):
+            self.previous_pages = previous.get("pages", {})
+        self.previous_entries = previous.get("pages", {})
+        self.previous_outputs = {entry["output"] for entry in self.previous_entries.values()}
+        self.static_files = dict(previous.get("static", {}))
+        self.assets = previous.get("assets", {})
+        self.images = previous.get("images")
+        self.image_digests = previous.get("image_digests", {})
+        self.minify = previous.get("minify", False)
+        self.compressed = previous.get("compressed", {})
+        self._template_hashes = {}
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, "r") as manifest_file:
+                data = json.load(manifest_file)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != MANIFEST_VERSION:
+            return {}
+
+        return data
+
+    def use_assets(self, assets: dict[str, str]) -> None:
+        """Sets the fingerprinted asset URLs for this build.
+
+        Every page is stale when they differ from the previous build's, since
+        pages embed the asset URLs.
+
+        Args:
+            assets (dict[str, str]): Fingerprinted URLs keyed by plain URL.
+        """
+        if assets != self.assets:
+            self.previous_pages = {}
+        self.assets = assets
+
+    def use_images(self, images: dict[str, dict] | None) -> None:
+        """Sets the image sizes and variants for this build.
+
+        Every page is stale when they differ from the previous build's, since
+        pages embed them in their <img> tags.
+
+        Args:
+            images (dict[str, dict] | None): The collect_images result, or None.
+        """
+        if images != self.images:
+            self.previous_pages = {}
+        self.images = images
+
+    def use_minify(self, minify: bool) -> None:
+        """Sets whether this build minifies the template.
+
+        Every page is stale when this differs from the previous build.
+
+        Args:
+            minify (bool): The --minify setting.
+        """
+        if minify != self.minify:
+            self.previous_pages = {}
+        self.minify = minify
+
+    def known_hash(self, source_path: Path, size: int, mtime_ns: int) -> str | None:
+        """Returns the recorded hash of a source whose size and mtime are unchanged.
+
+        This lets unchanged sources skip hashing entirely.
+
+        Args:
+            source_path (Path): The markdown source.
+            size (int): Its current size in bytes.
+            mtime_ns (int): Its current modification time in nanoseconds.
+
+        Returns:
+            str | None: The recorded hash, or None if the file may have changed.
+        """
+        entry = self.previous_entries.get(str(source_path))
+
+        if entry is None or entry.get("size") != size or entry.get("mtime_ns") != mtime_ns:
+            return None
+
+        return entry["hash"]
+
+    def is_fresh(self, source_path: Path, dest_path: Path, source_hash: str) -> bool:
+        """Checks whether a page's output is up to date with its inputs.
+
+        Args:
+            source_path (Path): The markdown source.
+            dest_path (Path): The HTML output.
+            source_hash (str): Hash of the current source contents.
+
+        Returns:
+            bool: True if the page does not need to be regenerated.
+        """
+        entry = self.previous_pages.get(str(source_path))
+
+        if entry is None:
+            return False
+        if "template" in entry:
+            template_path, template_hash = entry["template"]
+            if self._template_hash(Path(template_path)) != template_hash:
+                return False
+
+        return (
+            entry["hash"] == source_hash
+            and entry["output"] == str(dest_path)
+            and dest_path.exists()
+        )
+
+    def _template_hash(self, template_path: Path) -> str | None:
+        if template_path not in self._template_hashes:
+            try:
+                self._template_hashes[template_path] = hash_file(template_path)
+            except OSError:
+                self._template_hashes[template_path] = None
+
+        return self._template_hashes[template_path]
+
+    def record_template(self, source_path: Path, template_path: Path) -> None:
+        """Records that a page was rendered with a template other than the default.
+
+        The page is then considered stale whenever that template changes.
+
+        Args:
+            source_path (Path): The markdown source, already recorded with record().
+            template_path (Path): The template named in the page's front matter.
+        """
+        self.pages[str(source_path)]["template"] = [str(template_path), self._template_hash(template_path)]
+
+    def record(
+        self, source_path: Path, dest_path: Path, source_hash: str, size: int = None, mtime_ns: int = None
+    ) -> None:
+        """Records a page that is part of this build.
+
+        Args:
+            source_path (Path): The markdown source.
+            dest_path (Path): The HTML output.
+            source_hash (str): Hash of the source contents.
+            size (int, optional): Source size, enabling known_hash on the next build.
+            mtime_ns (int, optional): Source modification time, enabling known_hash on the next build.
+        """
+        self.pages[str(source_path)] = {
+            "hash": source_hash,
+            "output": str(dest_path),
+            "size": size,
+            "mtime_ns": mtime_ns,
+        }
+
+    def record_output_hash(self, source_path: Path, output_hash: str) -> None:
+        """Records the hash of the HTML written for a page (see write_atomic).
+
+        Args:
+            source_path (Path): The markdown source, already recorded with record().
+            output_hash (str): Hex digest of the page's output.
+        """
+        self.pages[str(source_path)]["output_hash"] = output_hash
+
+    def output_hash(self, source_path: Path, dest_path: Path) -> str | None:
+        """Returns the hash last recorded for a page's output.
+
+        It lets write_atomic tell whether the output changed without reading
+        the existing file back. A hash recorded by this build, e.g. by an
+        earlier rebuild of the dev server, takes precedence over the
+        previous build's.
+
+        Args:
+            source_path (Path): The markdown source.
+            dest_path (Path): The HTML output.
+
+        Returns:
+            str | None: The hash, or None if none was recorded for that output.
+        """
+        entry = self.pages.get(str(source_path))
+        if entry is None or "output_hash" not in entry:
+            entry = self.previous_entries.get(str(source_path))
+
+        if entry is None or entry["output"] != str(dest_path):
+            return None
+
+        return entry.get("output_hash")
+
+    def record_summary(self, source_path: Path, summary: dict) -> None:
+        """Records the text summary collected while a page was rendered.
+
+        Args:
+            source_path (Path): The markdown source, already recorded with record().
+            summary (dict): The page's PageSummary.to_dict().
+        """
+        self.pages[str(source_path)]["summary"] = summary
+
+    def has_summary(self, source_path: Path) -> bool:
+        """Checks whether the previous build recorded a summary for a page.
+
+        Args:
+            source_path (Path): The markdown source.
+
+        Returns:
+            bool: True if a fresh page can reuse its previous summary.
+        """
+        return "summary" in self.previous_pages.get(str(source_path), {})
+
+    def carry_over(self, source_path: Path) -> None:
+        """Keeps what was recorded for a page that is not re-rendered.
+
+        Its template, summary and output hash are only known after
+        rendering, so a fresh page takes them from the previous build.
+
+        Args:
+            source_path (Path): The markdown source, already recorded with record().
+        """
+        previous = self.previous_pages.get(str(source_path), {})
+        entry = self.pages[str(source_path)]
+
+        for key in ("template", "summary", "output_hash"):
+            if key in previous:
+                entry[key] = previous[key]
+
+    def forget(self, source_path: Path) -> None:
+        """Drops a page whose source was deleted from this build's entries.
+
+        Args:
+            source_path (Path): The markdown source.
+        """
+        self.pages.pop(str(source_path), None)
+
+    def prune(self) -> list[Path]:
+        """Deletes outputs from the previous build whose sources no longer exist.
+
+        Returns:
+            list[Path]: The output files that were removed.
+        """
+        current_outputs = {entry["output"] for entry in self.pages.values()}
+        removed = []
+
+        for output in sorted(self.previous_outputs - current_outputs):
+            output_path = Path(output)
+            if output_path.is_file():
+                output_path.unlink()
+                removed.append(output_path)
+
+        return removed
+
+    def save(self) -> None:
+        """Writes the manifest for this build to disk."""
+        data = {
+            "version": MANIFEST_VERSION,
+            "render_version": RENDER_VERSION,
+            "template": self.template_hash,
+            "base_path": self.base_path,
+            "pages": self.pages,
+            "static": self.static_files,
+            "assets": self.assets,
+            "images": self.images,
+            "image_digests": self.image_digests,
+            "minify": self.minify,
+            "compressed": self.compressed,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps(data, indent=1, sort_keys=True))
+        tmp_path.replace(self.path)
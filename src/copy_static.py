@@ -1,19 +1,205 @@
+import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from build_manifest import hash_file
 
+DEFAULT_COPY_THREADS = 8
+FINGERPRINT_LENGTH = 10
+FINGERPRINT_SUFFIXES = frozenset(
+    (".css", ".js", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".svg", ".woff", ".woff2")
+)
 
-def copy_files_recursive(source_dir_path, dest_dir_path):
-    if not source_dir_path.is_dir():
-        return
-    if not dest_dir_path.exists():
-        dest_dir_path.mkdir(parents=True, exist_ok=True)
 
-    for filename in source_dir_path.iterdir():
-        from_path = source_dir_path / filename.name
-        dest_path = dest_dir_path / filename.name
+def list_files(root: Path) -> dict[str, os.stat_result]:
+    """Collects every file under a directory with one scandir walk.
 
-        print(f" * {from_path} -> {dest_path}")
+    Args:
+        root (Path): The directory to walk.
 
-        if from_path.is_file():
-            shutil.copy(from_path, dest_path)
+    Returns:
+        dict[str, os.stat_result]: Stat results keyed by POSIX path relative to root.
+    """
+    files = {}
+
+    if not root.is_dir():
+        return files
+    pending = [(root, "")]
+
+    while pending:
+        dir_path, prefix = pending.pop()
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                rel_path = prefix + entry.name
+                if entry.is_dir():
+                    pending.append((Path(entry.path), rel_path + "/"))
+                elif entry.is_file():
+                    files[rel_path] = entry.stat()
+
+    return files
+
+
+def is_unchanged(from_path: Path, from_stat, dest_path: Path, checksum: bool = False) -> bool:
+    """Checks whether a destination file already matches its source.
+
+    Args:
+        from_path (Path): The source file.
+        from_stat (os.stat_result): Stat result of the source file.
+        dest_path (Path): The destination file.
+        checksum (bool, optional): Compare content hashes instead of mtimes. Defaults to False.
+
+    Returns:
+        bool: True if the file does not need copying.
+    """
+    try:
+        dest_stat = dest_path.stat()
+    except FileNotFoundError:
+        return False
+    if dest_stat.st_size != from_stat.st_size:
+        return False
+    if checksum:
+        return hash_file(from_path) == hash_file(dest_path)
+
+    return dest_stat.st_mtime_ns == from_stat.st_mtime_ns
+
+
+def fingerprint_path(rel_path: str, digest: str) -> str:
+    """Inserts a content hash before a file's suffix, e.g. "index.css" -> "index.1a2b3c4d5e.css".
+
+    Args:
+        rel_path (str): POSIX path relative to the static directory.
+        digest (str): Hex digest of the file's contents.
+
+    Returns:
+        str: The fingerprinted relative path.
+    """
+    path = Path(rel_path)
+
+    return path.with_name(f"{path.stem}.{digest[:FINGERPRINT_LENGTH]}{path.suffix}").as_posix()
+
+
+def asset_urls(synced: dict[str, str]) -> dict[str, str]:
+    """Maps the root-relative URL of each fingerprinted file to its new URL.
+
+    Args:
+        synced (dict[str, str]): The result of sync_static.
+
+    Returns:
+        dict[str, str]: E.g. {"/index.css": "/index.1a2b3c4d5e.css"}.
+    """
+    return {f"/{rel_path}": f"/{dest_rel_path}" for rel_path, dest_rel_path in synced.items() if rel_path != dest_rel_path}
+
+
+def copy_file(from_path: Path, dest_path: Path, link: bool = False) -> None:
+    """Copies one file, preserving its mtime so later syncs can skip it.
+
+    Hardlinks the file when `link` is set and both paths share a filesystem.
+    Otherwise the data goes through os.copy_file_range, which lets the kernel
+    copy in place (or reflink on filesystems that support it), falling back to
+    shutil.copyfile.
+
+    Args:
+        from_path (Path): The source file.
+        dest_path (Path): The destination file.
+        link (bool, optional): Hardlink instead of copying when possible. Defaults to False.
+    """
+    dest_path.parent.mkdir(parents=True, exist_ok=True)
+    dest_path.unlink(missing_ok=True)
+
+    if link:
+        try:
+            os.link(from_path, dest_path)
+            return
+        except OSError:
+            pass
+    try:
+        _copy_file_range(from_path, dest_path)
+    except (AttributeError, OSError):
+        shutil.copyfile(from_path, dest_path)
+    shutil.copystat(from_path, dest_path)
+
+
+def _copy_file_range(from_path: Path, dest_path: Path) -> None:
+    with open(from_path, "rb") as from_file, open(dest_path, "wb") as dest_file:
+        remaining = os.fstat(from_file.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(from_file.fileno(), dest_file.fileno(), remaining)
+            if copied == 0:
+                break
+            remaining -= copied
+
+
+def sync_static(
+    source_dir_path: Path,
+    dest_dir_path: Path,
+    previous_files=None,
+    checksum: bool = False,
+    link: bool = False,
+    threads: int = DEFAULT_COPY_THREADS,
+    fingerprint: bool = False,
+) -> dict[str, str]:
+    """Makes dest_dir_path hold an up-to-date copy of every file in source_dir_path.
+
+    Files whose size and mtime (or content hash, with `checksum`) already
+    match are skipped, and files copied by a previous sync whose source has
+    since been deleted are removed. Other files in the destination, such as
+    generated pages, are left alone.
+
+    With `fingerprint`, assets (FINGERPRINT_SUFFIXES) are also copied under a
+    name containing their content hash, so they can be served with immutable
+    cache headers. An asset whose size and mtime still match its previous
+    fingerprinted copy keeps that name without being hashed again. Only href
+    and src attributes in templates and markdown are pointed at the hashed
+    names, so the plain names are kept as well: url() references in
+    stylesheets, imports in scripts and links from other sites still
+    resolve.
+
+    Args:
+        source_dir_path (Path): The static directory.
+        dest_dir_path (Path): The output directory.
+        previous_files (dict[str, str] | None, optional): The previous sync's result.
+        checksum (bool, optional): Compare content hashes instead of mtimes. Defaults to False.
+        link (bool, optional): Hardlink files instead of copying when possible. Defaults to False.
+        threads (int, optional): Number of concurrent copies. Defaults to DEFAULT_COPY_THREADS.
+        fingerprint (bool, optional): Put content hashes in asset names. Defaults to False.
+
+    Returns:
+        dict[str, str]: The relative path each static file was synced to, keyed by its own.
+    """
+    previous_files = previous_files or {}
+    files = list_files(source_dir_path)
+    synced = {}
+
+    for rel_path, from_stat in files.items():
+        synced[rel_path] = rel_path
+        if not fingerprint or Path(rel_path).suffix.lower() not in FINGERPRINT_SUFFIXES:
+            continue
+        from_path = source_dir_path / rel_path
+        previous = previous_files.get(rel_path, rel_path)
+        if previous != rel_path and not checksum and is_unchanged(from_path, from_stat, dest_dir_path / previous):
+            synced[rel_path] = previous
         else:
-            copy_files_recursive(from_path, dest_path)
+            synced[rel_path] = fingerprint_path(rel_path, hash_file(from_path))
+
+    targets = [
+        (rel_path, from_stat, dest_rel_path)
+        for rel_path, from_stat in sorted(files.items())
+        for dest_rel_path in dict.fromkeys((synced[rel_path], rel_path))
+    ]
+    to_copy = [
+        (source_dir_path / rel_path, dest_dir_path / dest_rel_path)
+        for rel_path, from_stat, dest_rel_path in targets
+        if not is_unchanged(source_dir_path / rel_path, from_stat, dest_dir_path / dest_rel_path, checksum)
+    ]
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda paths: copy_file(*paths, link=link), to_copy))
+
+    published = set(synced) | set(synced.values())
+    stale = sorted((set(previous_files) | set(previous_files.values())) - published)
+    for rel_path in stale:
+        (dest_dir_path / rel_path).unlink(missing_ok=True)
+
+    print(f" * {len(to_copy)} copied, {len(targets) - len(to_copy)} unchanged, {len(stale)} removed")
+
+    return synced
@@ -1,39 +1,506 @@
+import io
 import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
 from pathlib import Path
-from markdown_blocks import markdown_to_html_node
+from typing import Callable, NamedTuple
+from ast_cache import AstCache
+from build_manifest import hash_bytes, hash_file
+from html_node import escape_text
+from markdown_blocks import inline_cache_info, markdown_to_html_node, set_inline_cache_size, write_markdown_html
+from page_meta import read_header, split_front_matter
+from site_files import PageSummary
+from site_index import DEFAULT_INCLUDE, build_site_index
+from page_io import BackgroundWriter, make_output_dirs, prefetch, write_atomic
+from template import Template
 
 
-def generate_pages_recursive(dir_path_content: Path, template_path, dest_dir_path, base_path):
-    for path in dir_path_content.iterdir():
-        dest_path = dest_dir_path / path.name
+class PageGenerationError(Exception):
+    """Raised when a page fails to render, naming the source file."""
+
+
+class RenderContext(NamedTuple):
+    """What every page of a build is rendered with.
+
+    Worker processes receive it once, through the pool initializer, so the
+    template (with its image table) is not pickled again for every page.
+
+    Attributes:
+        render (Callable): generate_page, or profile_page with --profile.
+        template (Template): The default template.
+        base_path (str): URL prefix the site is served under.
+        ast_cache (AstCache | None): The parsed-tree cache.
+        summarize (bool): Whether to collect page summaries.
+    """
+
+    render: Callable
+    template: Template
+    base_path: str
+    ast_cache: AstCache | None
+    summarize: bool
+
+
+class PageTask(NamedTuple):
+    """One page to render.
+
+    Attributes:
+        source (Path): The markdown file.
+        dest (Path): The HTML file.
+        source_hash (str | None): Hash of the source, if already known.
+        size (int): Source size in bytes.
+        mtime_ns (int | None): Source modification time in nanoseconds.
+        output_hash (str | None): Hash of dest as the previous build wrote it, if recorded.
+    """
+
+    source: Path
+    dest: Path
+    source_hash: str | None
+    size: int
+    mtime_ns: int | None = None
+    output_hash: str | None = None
+
+
+def generate_pages_recursive(
+    dir_path_content: Path,
+    template_path,
+    dest_dir_path,
+    base_path,
+    *,
+    manifest=None,
+    jobs=1,
+    ast_cache=None,
+    profiler=None,
+    io_threads=0,
+    include=DEFAULT_INCLUDE,
+    exclude=(),
+    summarize=False,
+    assets=None,
+    images=None,
+    minify=False,
+):
+    """Renders every page in the content tree that is not up to date.
+
+    Everything after the base path is keyword-only, since most builds set
+    only a few of these options.
+
+    Args:
+        dir_path_content (Path): The content directory.
+        template_path (Path): The default template.
+        dest_dir_path (Path): The output directory.
+        base_path (str): URL prefix the site is served under.
+        manifest (BuildManifest | None, optional): Skips fresh pages and records rendered ones.
+        jobs (int, optional): Number of worker processes. Defaults to 1.
+        ast_cache (AstCache | None, optional): The parsed-tree cache.
+        profiler (Profiler | None, optional): Times every page's stages.
+        io_threads (int, optional): With one job, prefetch and write on this many threads.
+        include (Iterable[str], optional): Globs a source must match.
+        exclude (Iterable[str], optional): Globs that drop a source.
+        summarize (bool, optional): Collect page summaries for the site files.
+        assets (dict[str, str] | None, optional): Fingerprinted asset URLs.
+        images (dict[str, dict] | None, optional): The collect_images result.
+        minify (bool, optional): Minify the templates.
+
+    Raises:
+        PageGenerationError: If a page fails to render.
+    """
+    reset_page_templates()
+    template = Template.from_file(template_path, base_path, assets, images, minify)
+    render = generate_page
+    if profiler is not None:
+        from profiling import profile_page
+
+        render = profile_page
+    context = RenderContext(render, template, base_path, ast_cache, summarize)
+    work = []
+
+    pages = build_site_index(dir_path_content, dest_dir_path, include, exclude)
+
+    for page in pages:
+        source_hash = output_hash = None
+
+        if manifest is not None:
+            source_hash = manifest.known_hash(page.source, page.size, page.mtime_ns) or hash_file(page.source)
+            fresh = manifest.is_fresh(page.source, page.dest, source_hash) and (
+                not summarize or manifest.has_summary(page.source)
+            )
+            manifest.record(page.source, page.dest, source_hash, page.size, page.mtime_ns)
+            if fresh:
+                manifest.carry_over(page.source)
+                continue
+            output_hash = manifest.output_hash(page.source, page.dest)
+        work.append(PageTask(page.source, page.dest, source_hash, page.size, page.mtime_ns, output_hash))
+
+    make_output_dirs(task.dest for task in work)
+    inline_cache = inline_cache_info()
+    # Latest (hits, misses) of each process that rendered pages; this
+    # process's earlier counts are subtracted when reporting.
+    inline_start = dict([_inline_cache_counts()]) if inline_cache is not None else {}
+    inline_counts = dict(inline_start)
+
+    if io_threads > 0 and jobs <= 1 and profiler is None:
+        executor = None
+        results = _generate_pages_batched(context, work, io_threads)
+    elif jobs > 1 and len(work) > 1:
+        executor = ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_worker,
+            initargs=(context, inline_cache.maxsize if inline_cache is not None else 0),
+        )
+        chunks = interleave_chunks(work, jobs * 4)
+        # Chunks are dealt by size; put results back in content order so
+        # progress lines and the profile report match a single-job build.
+        position = {task.source: index for index, task in enumerate(work)}
+        results = sorted(
+            chain.from_iterable(executor.map(_generate_page_chunk, chunks)),
+            key=lambda item: position[item[0].source],
+        )
+    else:
+        executor = None
+        results = ((task, render_task(task, context)) for task in work)
+
+    bytes_saved = minified_pages = 0
+
+    try:
+        for task, result in results:
+            record_page(task, result, manifest, template_path)
+            if profiler is not None and not result["meta"].get("draft"):
+                profiler.add(task.source, result)
+            if "inline_cache" in result:
+                inline_counts.update([result["inline_cache"]])
+            if "bytes_saved" in result:
+                bytes_saved += result["bytes_saved"]
+                minified_pages += 1
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    if inline_cache is not None:
+        inline_counts.update([_inline_cache_counts()])
+        _report_inline_cache(inline_counts, inline_start, inline_cache.maxsize)
+    if minify:
+        print(f"Minify: saved {bytes_saved} bytes across {minified_pages} rendered pages")
+
+
+def _inline_cache_counts():
+    info = inline_cache_info()
+
+    return os.getpid(), (info.hits, info.misses)
+
+
+def _report_inline_cache(inline_counts, inline_start, maxsize):
+    hits = misses = 0
+
+    for pid, (pid_hits, pid_misses) in inline_counts.items():
+        start_hits, start_misses = inline_start.get(pid, (0, 0))
+        hits += pid_hits - start_hits
+        misses += pid_misses - start_misses
+    lookups = hits + misses
+    hit_rate = hits / lookups if lookups else 0.0
+
+    print(f"Inline cache: {hits} hits, {misses} misses ({hit_rate:.1%} hit rate, max {maxsize} entries per process)")
+
+
+def _generate_pages_batched(context: RenderContext, work, io_threads):
+    sources = prefetch([task.source for task in work], io_threads)
+
+    with BackgroundWriter(io_threads) as writer:
+        for task, markdown_content in zip(work, sources):
+            try:
+                page, result = render_page(
+                    markdown_content,
+                    context.template,
+                    context.base_path,
+                    cache_for_source(context.ast_cache, task.size),
+                    task.source_hash,
+                    context.summarize,
+                )
+            except Exception as e:
+                raise PageGenerationError(f"{task.source}: {e}") from e
+            if page is not None and (
+                result["output_hash"] != task.output_hash or not _has_size(task.dest, len(page.encode()))
+            ):
+                writer.submit(task.dest, page, task.output_hash)
+            yield task, result
+
+
+def _has_size(path: Path, size: int) -> bool:
+    try:
+        return path.stat().st_size == size
+    except FileNotFoundError:
+        return False
+
+
+def interleave_chunks(work: list[PageTask], count: int) -> list[list[PageTask]]:
+    """Splits pages into chunks of similar total size for the worker pool.
+
+    Pages are sorted largest first and dealt out round-robin, so each chunk
+    mixes large and small pages. The chunks holding the largest pages are
+    handed out first, so no worker is left with a big page at the end.
+
+    Args:
+        work (list[PageTask]): The pages to render.
+        count (int): The number of chunks wanted.
+
+    Returns:
+        list[list[PageTask]]: At most `count` non-empty chunks.
+    """
+    work = sorted(work, key=lambda task: task.size, reverse=True)
+    count = max(1, min(count, len(work)))
+
+    return [work[index::count] for index in range(count)]
+
+
+def _generate_page_chunk(tasks: list[PageTask]):
+    return [(task, render_task(task)) for task in tasks]
+
+
+_worker_context = None
+
+
+def _init_worker(context: RenderContext, inline_cache_size: int) -> None:
+    global _worker_context
+    _worker_context = context
+    set_inline_cache_size(inline_cache_size)
 
-        if path.is_file():
-            dest_path = dest_path.with_suffix(".html")
-            generate_page(path, template_path, dest_path, base_path)
-        else:
-            generate_pages_recursive(path, template_path, dest_path, base_path)
 
+def render_task(task: PageTask, context: RenderContext | None = None) -> dict:
+    """Renders one page in this process and returns its result.
 
-def generate_page(from_path, template_path, dest_path, base_path):
-    print(f" * {from_path} {template_path} -> {dest_path}")
+    Args:
+        task (PageTask): The page.
+        context (RenderContext | None, optional): What to render it with;
+            defaults to the one a pool worker was initialized with.
 
+    Raises:
+        PageGenerationError: If the page fails to render.
+
+    Returns:
+        dict: The page_result, plus this process's inline cache counts if enabled.
+    """
+    context = context or _worker_context
+
+    try:
+        result = context.render(
+            task.source,
+            context.template,
+            task.dest,
+            context.base_path,
+            cache_for_source(context.ast_cache, task.size),
+            task.source_hash,
+            context.summarize,
+            task.output_hash,
+        )
+    except Exception as e:
+        raise PageGenerationError(f"{task.source}: {e}") from e
+    if inline_cache_info() is not None:
+        result["inline_cache"] = _inline_cache_counts()
+
+    return result
+
+
+def record_page(task: PageTask, result: dict, manifest=None, template_path=None) -> None:
+    """Records a rendered page in the manifest, or drops it if it is a draft.
+
+    Every build path and the dev server go through here, so the manifest
+    entry of a rendered page is complete however it was rendered. A draft's
+    output is removed.
+
+    Args:
+        task (PageTask): The page.
+        result (dict): What rendering it returned (see page_result).
+        manifest (BuildManifest | None, optional): The manifest to update.
+        template_path (Path | None, optional): The default template, for the progress line.
+    """
+    meta = result["meta"]
+
+    if meta.get("draft"):
+        print(f" - skipped draft {task.source}")
+        task.dest.unlink(missing_ok=True)
+        if manifest is not None:
+            manifest.forget(task.source)
+        return
+    print(f" * {task.source} {meta.get('template', template_path)} -> {task.dest}")
+    if manifest is None:
+        return
+    manifest.record(task.source, task.dest, task.source_hash, task.size, task.mtime_ns)
+    if "template" in meta:
+        manifest.record_template(task.source, Path(meta["template"]))
+    if "summary" in result:
+        manifest.record_summary(task.source, result["summary"])
+    manifest.record_output_hash(task.source, result["output_hash"])
+
+
+def render_and_record(task: PageTask, context: RenderContext, manifest=None, template_path=None) -> dict:
+    """Renders one page in this process and records it, as a build does for each page.
+
+    Returns:
+        dict: The page's result.
+    """
+    result = render_task(task, context)
+    record_page(task, result, manifest, template_path)
+
+    return result
+
+
+# Per build: the size, mtime, hash and text of each front-matter template
+# file, and the templates compiled from them, keyed by hash and settings.
+_template_files = {}
+_templates = {}
+
+
+def reset_page_templates() -> None:
+    """Forgets the front-matter templates read so far, at the start of a build."""
+    _template_files.clear()
+    _templates.clear()
+
+
+def page_template(meta, template: Template, base_path):
+    """Returns the compiled template a page asked for in its front matter.
+
+    A template file is only read and hashed again when its size or mtime
+    changes, and pages naming the same contents share one compiled
+    template. Both caches last for one build (see reset_page_templates), so
+    the dev server picks up template edits without accumulating stale
+    entries. They share the default template's fingerprinted asset URLs,
+    image sizes and minify setting.
+    """
+    if "template" not in meta:
+        return template
+    path = meta["template"]
+    stat = os.stat(path)
+    stat_key = (stat.st_size, stat.st_mtime_ns)
+    known = _template_files.get(path)
+
+    if known is None or known[0] != stat_key:
+        with open(path, "r") as template_file:
+            text = template_file.read()
+        known = _template_files[path] = (stat_key, hash_bytes(text.encode()), text)
+    _, digest, text = known
+    key = (digest, base_path, template.assets_key, template.images_key, template.minify)
+
+    if key not in _templates:
+        _templates[key] = Template(text, base_path, template.assets, template.images, template.minify)
+
+    return _templates[key]
+
+
+def generate_page(
+    from_path,
+    template: Template,
+    dest_path,
+    base_path,
+    ast_cache=None,
+    source_hash=None,
+    summarize=False,
+    output_hash=None,
+):
     with open(from_path, "r") as from_file:
-        markdown_content = from_file.read()
+        meta, body_pos = read_header(from_file)
+
+        if meta.get("draft"):
+            return page_result(meta)
+        template = page_template(meta, template, base_path)
+        from_file.seek(body_pos)
+
+        if ast_cache is None:
+            summary = PageSummary() if summarize else None
+            on_block = summary.add if summary is not None else None
+            write_content = lambda out, rewrite_url, image_attrs: write_markdown_html(
+                from_file, out, rewrite_url, on_block, image_attrs
+            )
+        else:
+            body = from_file.read()
+            node = cached_markdown_to_html_node(body, ast_cache, source_hash or hash_bytes(body.encode()))
+            write_content = node.write_html
+            summary = PageSummary.from_blocks(node.children) if summarize else None
+
+        output_hash = write_page(dest_path, template, meta["title"], write_content, output_hash)
+
+    return page_result(meta, summary, template, output_hash)
+
+
+def page_result(
+    meta, summary: PageSummary | None = None, template: Template | None = None, output_hash: str | None = None
+) -> dict:
+    """Returns what rendering a page reports back, for record_page.
+
+    That is its metadata and, unless it is a draft, the hash of its output
+    and, if collected, its summary and, if its template was minified, the
+    bytes that saved.
+    """
+    result = {"meta": meta}
+
+    if summary is not None:
+        result["summary"] = summary.to_dict(meta)
+    if template is not None and template.minify:
+        result["bytes_saved"] = template.bytes_saved
+    if output_hash is not None:
+        result["output_hash"] = output_hash
+
+    return result
+
+
+def cache_for_source(ast_cache, source_size: int):
+    """Returns the parsed-tree cache to render a source with, or None to stream it.
+
+    Args:
+        ast_cache (AstCache | None): The build's cache.
+        source_size (int): Size of the markdown source in bytes.
+
+    Returns:
+        AstCache | None: The cache, unless there is none or the source is too large for it.
+    """
+    if ast_cache is None or not ast_cache.accepts(source_size):
+        return None
+
+    return ast_cache
+
+
+def cached_markdown_to_html_node(markdown_content, ast_cache, source_hash):
+    node = ast_cache.get(source_hash)
+
+    if node is None:
+        node = markdown_to_html_node(markdown_content)
+        ast_cache.put(source_hash, node)
+
+    return node
+
+
+def render_page(markdown_content, template: Template, base_path, ast_cache=None, source_hash=None, summarize=False):
+    meta, body = split_front_matter(markdown_content)
+
+    if meta.get("draft"):
+        return None, page_result(meta)
+    template = page_template(meta, template, base_path)
+
+    if ast_cache is None:
+        node = markdown_to_html_node(body)
+    else:
+        node = cached_markdown_to_html_node(body, ast_cache, source_hash or hash_bytes(body.encode()))
+    out = io.StringIO()
+    template.write(
+        out,
+        Title=escape_text(meta["title"]),
+        Content=lambda stream: node.write_html(stream, template.rewrite_url, template.image_attrs),
+    )
+    summary = PageSummary.from_blocks(node.children) if summarize else None
+    page = out.getvalue()
 
-    with open(template_path, "r") as template_file:
-        template = template_file.read()
+    return page, page_result(meta, summary, template, hash_bytes(page.encode()))
 
-    node = markdown_to_html_node(markdown_content)
-    html = node.to_html()
 
-    title = extract_title(markdown_content)
-    template = template.replace("{{ Title }}", title)
-    template = template.replace("{{ Content }}", html)
-    template = template.replace('href="/', f'href="{base_path}')
-    template = template.replace('src="/', f'src="{base_path}')
+def write_page(dest_path, template: Template, title, write_content, previous_hash=None) -> str:
+    _, output_hash = write_atomic(
+        dest_path,
+        lambda dest_file: template.write(
+            dest_file,
+            Title=escape_text(title),
+            Content=lambda out: write_content(out, template.rewrite_url, template.image_attrs),
+        ),
+        previous_hash,
+    )
 
-    dest_path.parent.mkdir(parents=True, exist_ok=True)
-    dest_path.write_text(template)
+    return output_hash
 
 
 def extract_title(md):
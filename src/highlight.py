@@ -0,0 +1,198 @@
+import re
+from collections import OrderedDict
+
+from build_manifest import hash_bytes
+from html_node import escape_text
+
+HIGHLIGHT_CACHE_SIZE = 1024
+
+STRING = r'"(?:[^"\\\n]|\\.)*"|' + r"'(?:[^'\\\n]|\\.)*'"
+NUMBER = r"\b(?:0[xX][0-9a-fA-F_]+|\d[\d_]*(?:\.\d[\d_]*)?(?:[eE][+-]?\d+)?)\b"
+C_COMMENT = r"//[^\n]*|/\*.*?\*/"
+
+
+def keywords(words: str) -> str:
+    """Builds a pattern matching any of the space-separated words as a whole word."""
+    return r"\b(?:" + "|".join(words.split()) + r")\b"
+
+
+# Token classes in priority order for each language. Comments and strings
+# come first so keywords inside them are not highlighted.
+LANGUAGE_TOKENS = {
+    "python": [
+        ("comment", r"#[^\n]*"),
+        ("string", r'(?:\b[rRbBfFuU]{1,2})?(?:"""(?:.|\n)*?"""|' + r"'''(?:.|\n)*?'''|" + STRING + ")"),
+        ("keyword", keywords(
+            "False None True and as assert async await break class continue def del elif else except "
+            "finally for from global if import in is lambda nonlocal not or pass raise return try while with yield"
+        )),
+        ("builtin", keywords(
+            "print len range open str int float bool list dict set tuple type isinstance super self "
+            "enumerate zip map filter sorted min max sum any all"
+        )),
+        ("number", NUMBER),
+    ],
+    "javascript": [
+        ("comment", C_COMMENT),
+        ("string", STRING + r"|`(?:[^`\\]|\\.)*`"),
+        ("keyword", keywords(
+            "async await break case catch class const continue debugger default delete do else export "
+            "extends finally for function if import in instanceof interface let new of return static "
+            "super switch this throw try type typeof var void while with yield true false null undefined"
+        )),
+        ("number", NUMBER),
+    ],
+    "bash": [
+        ("comment", r"(?<![\w$#{])#[^\n]*"),
+        ("string", STRING),
+        ("variable", r"\$\{[^}\n]*\}|\$\w+"),
+        ("keyword", keywords(
+            "if then else elif fi for while until do done case esac function in return export local "
+            "echo cd exit source"
+        )),
+        ("number", NUMBER),
+    ],
+    "json": [
+        ("string", r'"(?:[^"\\\n]|\\.)*"'),
+        ("keyword", keywords("true false null")),
+        ("number", r"-?" + NUMBER),
+    ],
+    "css": [
+        ("comment", r"/\*.*?\*/"),
+        ("string", STRING),
+        ("keyword", r"@[\w-]+|!important"),
+        # A hex colour followed by "{" on its line is an id selector such as #add.
+        ("number", r"#[0-9a-fA-F]{3,8}\b(?![^;{}\n]*\{)|(?<![\w-])-?(?:\d+\.?\d*|\.\d+)(?:%|[a-z]+)?"),
+    ],
+    "c": [
+        ("comment", C_COMMENT),
+        ("string", STRING),
+        ("keyword", r"#\w+|" + keywords(
+            "auto break case char class const continue default delete do double else enum extern float "
+            "for goto if inline int long namespace new private protected public return short signed "
+            "sizeof static struct switch template this typedef union unsigned using virtual void "
+            "volatile while true false nullptr NULL"
+        )),
+        ("number", NUMBER),
+    ],
+    "go": [
+        ("comment", C_COMMENT),
+        ("string", STRING + r"|`[^`]*`"),
+        ("keyword", keywords(
+            "break case chan const continue default defer else fallthrough for func go goto if import "
+            "interface map package range return select struct switch type var true false nil"
+        )),
+        ("number", NUMBER),
+    ],
+    "rust": [
+        ("comment", C_COMMENT),
+        ("string", r'b?"(?:[^"\\]|\\.)*"'),
+        ("keyword", keywords(
+            "as async await break const continue crate else enum extern false fn for if impl in let loop "
+            "match mod move mut pub ref return self Self static struct super trait true type unsafe use "
+            "where while"
+        )),
+        ("number", NUMBER),
+    ],
+}
+
+LANGUAGE_ALIASES = {
+    "py": "python",
+    "python3": "python",
+    "js": "javascript",
+    "jsx": "javascript",
+    "ts": "javascript",
+    "tsx": "javascript",
+    "typescript": "javascript",
+    "sh": "bash",
+    "shell": "bash",
+    "zsh": "bash",
+    "cpp": "c",
+    "c++": "c",
+    "h": "c",
+    "java": "c",
+    "golang": "go",
+    "rs": "rust",
+}
+
+
+def compile_language(tokens: list[tuple[str, str]]) -> re.Pattern:
+    """Combines a language's token patterns into one alternation with a named group per class."""
+    return re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in tokens), re.DOTALL)
+
+
+LANGUAGES = {name: compile_language(tokens) for name, tokens in LANGUAGE_TOKENS.items()}
+
+
+def resolve_language(info: str) -> str | None:
+    """Returns the highlighter name for a code fence info string, e.g. "py" -> "python".
+
+    Args:
+        info (str): The text after the opening ```, such as "python" or "js title=x".
+
+    Returns:
+        str | None: The language, or None if it is not supported.
+    """
+    name = info.split(maxsplit=1)[0].lower() if info.strip() else ""
+    name = LANGUAGE_ALIASES.get(name, name)
+
+    return name if name in LANGUAGES else None
+
+
+def highlight_html(code: str, language: str) -> str:
+    """Tokenizes code and returns escaped HTML with a span per token.
+
+    Each token is wrapped in `<span class="tok-CLASS">`, where CLASS is one
+    of comment, string, keyword, builtin, variable or number. Everything else
+    is escaped text.
+
+    Args:
+        code (str): The code.
+        language (str): A key of LANGUAGES.
+
+    Returns:
+        str: The highlighted HTML.
+    """
+    pieces = []
+    pos = 0
+
+    for match in LANGUAGES[language].finditer(code):
+        start = match.start()
+        if start > pos:
+            pieces.append(escape_text(code[pos:start]))
+        pieces.append(f'<span class="tok-{match.lastgroup}">{escape_text(match.group())}</span>')
+        pos = match.end()
+    pieces.append(escape_text(code[pos:]))
+
+    return "".join(pieces)
+
+
+_cache = OrderedDict()
+
+
+def highlight(code: str, language: str) -> str:
+    """Returns highlight_html(code, language), cached by language and code hash.
+
+    The cache is a per-process LRU of HIGHLIGHT_CACHE_SIZE entries, so page
+    workers never wait on each other and repeated snippets, or pages rebuilt
+    by the long-running dev server, are only tokenized once per process.
+
+    Args:
+        code (str): The code.
+        language (str): A key of LANGUAGES.
+
+    Returns:
+        str: The highlighted HTML.
+    """
+    key = (language, hash_bytes(code.encode()))
+    html = _cache.get(key)
+
+    if html is not None:
+        _cache.move_to_end(key)
+        return html
+    html = highlight_html(code, language)
+    _cache[key] = html
+    if len(_cache) > HIGHLIGHT_CACHE_SIZE:
+        _cache.popitem(last=False)
+
+    return html
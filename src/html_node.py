@@ -1,3 +1,51 @@
+import io
+from functools import lru_cache
+from types import MappingProxyType
+
+URL_PROPS = frozenset(("href", "src"))
+
+
+def escape_text(text: str) -> str:
+    """Escapes &, < and > for use as element content.
+
+    Strings without those characters, the common case, are returned as is
+    after three substring checks.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        str: The escaped text.
+    """
+    if "&" in text or "<" in text or ">" in text:
+        return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+    return text
+
+
+def escape_attribute(value: str) -> str:
+    """Escapes &, <, > and double quotes for use inside a double-quoted attribute.
+
+    Strings that need escaping go through a bounded cache, since the same
+    URLs and alt texts tend to repeat across a site.
+
+    Args:
+        value (str): The attribute value.
+
+    Returns:
+        str: The escaped value.
+    """
+    if '"' in value or "&" in value or "<" in value or ">" in value:
+        return _escape_attribute(value)
+
+    return value
+
+
+@lru_cache(maxsize=4096)
+def _escape_attribute(value: str) -> str:
+    return value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+
+
 class HTMLNode:
     """Base class representing an HTML node.
 
@@ -6,39 +54,76 @@ class HTMLNode:
         value (str | None): The textual content for leaf nodes.
         children (list[HTMLNode] | None): List of child HTMLNode objects.
         props (dict[str, str] | None): Dictionary of HTML attributes (e.g., {'class': 'main'}).
+
+    Nodes use __slots__ rather than a per-instance __dict__, since large pages
+    create millions of them.
     """
 
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
         self.children = children
         self.props = props
 
-    def to_html(self) -> str:
+    def to_html(self, rewrite_url=None, image_attrs=None) -> str:
         """Generates the HTML string representation of the node.
 
+        Args:
+            rewrite_url (Callable[[str], str] | None, optional): Applied to every
+                href and src attribute value as it is serialized.
+            image_attrs (Callable[[str], str] | None, optional): Called with the
+                src of every <img>; returns attributes to add, e.g. its size.
+
         Raises:
-            NotImplementedError: If the method is not implemented in a subclass.
+            NotImplementedError: If write_html is not implemented in a subclass.
 
         Returns:
             str: HTML string representation.
         """
-        raise NotImplementedError("to_html method not implemented")
+        out = io.StringIO()
+        self.write_html(out, rewrite_url, image_attrs)
+
+        return out.getvalue()
 
-    def props_to_html(self) -> str:
+    def write_html(self, out, rewrite_url=None, image_attrs=None) -> None:
+        """Writes the HTML representation of the node to a text stream.
+
+        Args:
+            out: Any object with a `write(str)` method, e.g. an open file.
+            rewrite_url (Callable[[str], str] | None, optional): Applied to every
+                href and src attribute value as it is serialized.
+            image_attrs (Callable[[str], str] | None, optional): Called with the
+                src of every <img>; returns attributes to add, e.g. its size.
+
+        Raises:
+            NotImplementedError: If the method is not implemented in a subclass.
+        """
+        raise NotImplementedError("write_html method not implemented")
+
+    def props_to_html(self, rewrite_url=None) -> str:
         """Converts props dictionary into a string of HTML attributes.
 
+        Args:
+            rewrite_url (Callable[[str], str] | None, optional): Applied to href
+                and src values, e.g. to prefix root-relative URLs with a base path.
+
         Returns:
-            str: A string of HTML attributes (e.g., ' class="main" id="top"').
+            str: A string of HTML attributes (e.g., ' class="main" id="top"'),
+                with values escaped.
         """
         if self.props is None:
             return ""
-        props_html = ""
+        if rewrite_url is None:
+            return "".join([f' {prop}="{escape_attribute(value)}"' for prop, value in self.props.items()])
 
-        for prop in self.props:
-            props_html += f' {prop}="{self.props[prop]}"'
-
-        return props_html
+        return "".join(
+            [
+                f' {prop}="{escape_attribute(rewrite_url(value) if prop in URL_PROPS else value)}"'
+                for prop, value in self.props.items()
+            ]
+        )
 
     def __repr__(self) -> str:
         """Returns a string representation of the HTML node for debugging.
@@ -50,26 +135,41 @@ class HTMLNode:
 
 
 class LeafNode(HTMLNode):
-    """Represents an HTML node with no children (a leaf node)."""
+    """Represents an HTML node with no children (a leaf node).
 
-    def __init__(self, tag, value, props=None):
+    Attributes:
+        raw (bool): The value is trusted HTML and is written without escaping.
+    """
+
+    __slots__ = ("raw",)
+
+    def __init__(self, tag, value, props=None, raw=False):
         super().__init__(tag, value, None, props)
+        self.raw = raw
 
-    def to_html(self) -> str:
-        """Converts the leaf node to its HTML string representation.
+    def write_html(self, out, rewrite_url=None, image_attrs=None) -> None:
+        """Writes the leaf node's HTML to a text stream.
 
-        Raises:
-            ValueError: If the node has no value when a tag is present.
+        Args:
+            out: Any object with a `write(str)` method.
+            rewrite_url (Callable[[str], str] | None, optional): Applied to href and src values.
+            image_attrs (Callable[[str], str] | None, optional): Adds attributes to <img> tags.
 
-        Returns:
-            str: The HTML string representation of the leaf node.
+        Raises:
+            ValueError: If the node has no value.
         """
         if self.value is None:
             raise ValueError("invalid HTML: no value")
+        value = self.value if self.raw else escape_text(self.value)
         if self.tag is None:
-            return self.value
+            out.write(value)
+            return
+
+        props = self.props_to_html(rewrite_url)
+        if image_attrs is not None and self.tag == "img" and self.props is not None:
+            props += image_attrs(self.props.get("src", ""))
 
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+        out.write(f"<{self.tag}{props}>{value}</{self.tag}>")
 
     def __repr__(self) -> str:
         """Returns a string representation of the LeafNode for debugging.
@@ -80,31 +180,56 @@ class LeafNode(HTMLNode):
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
 
 
+class FrozenLeafNode(LeafNode):
+    """A LeafNode that cannot be modified, so one instance can be shared by many trees.
+
+    Its props are a read-only mapping.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, tag, value, props=None, raw=False):
+        object.__setattr__(self, "tag", tag)
+        object.__setattr__(self, "value", value)
+        object.__setattr__(self, "children", None)
+        object.__setattr__(self, "props", None if props is None else MappingProxyType(dict(props)))
+        object.__setattr__(self, "raw", raw)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"cannot modify {type(self).__name__}.{name}")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"cannot modify {type(self).__name__}.{name}")
+
+
 class ParentNode(HTMLNode):
     """Represents an HTML node that contains other child nodes."""
 
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
-    def to_html(self) -> str:
-        """Recursively converts the parent node and its children into HTML.
+    def write_html(self, out, rewrite_url=None, image_attrs=None) -> None:
+        """Recursively writes the parent node and its children to a text stream.
+
+        Args:
+            out: Any object with a `write(str)` method.
+            rewrite_url (Callable[[str], str] | None, optional): Applied to href and src values.
+            image_attrs (Callable[[str], str] | None, optional): Adds attributes to <img> tags.
 
         Raises:
             ValueError: If the tag or children are missing.
-
-        Returns:
-            str: The HTML string representation of the parent node and its children.
         """
         if self.tag is None:
             raise ValueError("invalid HTML: no tag")
         if self.children is None:
             raise ValueError("invalid HTML: no children")
-        children_html = ""
 
+        out.write(f"<{self.tag}{self.props_to_html(rewrite_url)}>")
         for child in self.children:
-            children_html += child.to_html()
-
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
+            child.write_html(out, rewrite_url, image_attrs)
+        out.write(f"</{self.tag}>")
 
     def __repr__(self) -> str:
         """Returns a string representation of the ParentNode for debugging.
@@ -0,0 +1,310 @@
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from build_manifest import stat_digest
+from copy_static import FINGERPRINT_LENGTH, copy_file, is_unchanged
+from html_node import escape_attribute
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is only needed for --image-widths.
+    Image = None
+
+IMAGE_SUFFIXES = frozenset((".png", ".gif", ".jpg", ".jpeg", ".webp"))
+# Pillow would only keep the first frame of an animated GIF.
+VARIANT_SUFFIXES = frozenset((".png", ".jpg", ".jpeg", ".webp"))
+# Start-of-frame markers, which carry the size; C4, C8 and CC are other segments.
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+LAZY_ATTRIBUTES = ' loading="lazy" decoding="async"'
+
+
+def read_image_size(path: Path) -> tuple[int, int] | None:
+    """Reads an image's width and height from its header without decoding it.
+
+    PNG, GIF and WebP keep the size within the first 30 bytes. JPEG keeps it
+    in the start-of-frame segment, which is found by seeking from one
+    segment header to the next.
+
+    Args:
+        path (Path): A PNG, GIF, JPEG or WebP file.
+
+    Returns:
+        tuple[int, int] | None: (width, height), or None if the format is not recognized.
+    """
+    with open(path, "rb") as image_file:
+        head = image_file.read(32)
+
+        if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+            return struct.unpack(">II", head[16:24])
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", head[6:10])
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            return _webp_size(head)
+        if head[:2] == b"\xff\xd8":
+            image_file.seek(2)
+            return _jpeg_size(image_file)
+
+    return None
+
+
+def _webp_size(head: bytes) -> tuple[int, int] | None:
+    chunk = head[12:16]
+
+    if chunk == b"VP8 " and head[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack("<HH", head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and head[20] == 0x2F:
+        bits = int.from_bytes(head[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        return int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1
+
+    return None
+
+
+def _jpeg_size(image_file) -> tuple[int, int] | None:
+    while True:
+        marker = image_file.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        code = marker[1]
+        while code == 0xFF:
+            fill = image_file.read(1)
+            if not fill:
+                return None
+            code = fill[0]
+        if code == 0x01 or 0xD0 <= code <= 0xD8:
+            continue
+        header = image_file.read(2)
+        if len(header) < 2:
+            return None
+        if code in JPEG_SOF_MARKERS:
+            frame = image_file.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack(">xHH", frame)
+            return width, height
+        image_file.seek(struct.unpack(">H", header)[0] - 2, os.SEEK_CUR)
+
+
+def parse_widths(text: str) -> tuple[int, ...]:
+    """Parses a comma-separated list of variant widths, e.g. "480,960".
+
+    Raises:
+        ValueError: If a width is not a positive integer.
+    """
+    widths = sorted({int(width) for width in text.split(",") if width.strip()})
+
+    if not widths or widths[0] <= 0:
+        raise ValueError(f"invalid widths: {text}")
+
+    return tuple(widths)
+
+
+def variant_path(rel_path: str, digest: str, width: int) -> str:
+    """Names a downscaled copy of an image, e.g. "a.png" -> "a.1a2b3c4d5e.480w.png".
+
+    The source's content hash is part of the name, so a variant's URL
+    changes whenever its source does.
+
+    Args:
+        rel_path (str): POSIX path of the source relative to the static directory.
+        digest (str): Hex digest of the source's contents.
+        width (int): The variant's width in pixels.
+
+    Returns:
+        str: The variant's relative path.
+    """
+    path = Path(rel_path)
+
+    return path.with_name(f"{path.stem}.{digest[:FINGERPRINT_LENGTH]}.{width}w{path.suffix}").as_posix()
+
+
+def make_variant(task: tuple[Path, Path, int]) -> None:
+    """Downscales an image to a width, keeping its aspect ratio.
+
+    The variant is saved in the source's format under a temporary name and
+    renamed into place, so an interrupted build leaves no partial file.
+
+    Args:
+        task (tuple[Path, Path, int]): The source image, where to write the
+            variant, and the variant's width.
+    """
+    from_path, dest_path, width = task
+    tmp_path = dest_path.with_name(dest_path.name + ".tmp")
+
+    with Image.open(from_path) as image:
+        height = max(1, round(image.height * width / image.width))
+        image.resize((width, height), Image.Resampling.LANCZOS).save(tmp_path, format=image.format)
+    tmp_path.replace(dest_path)
+
+
+def collect_images(
+    source_dir_path: Path,
+    dest_dir_path: Path,
+    cache_dir_path: Path,
+    static_files,
+    widths=(),
+    jobs: int = 1,
+    digests: dict[str, list] | None = None,
+    checksum: bool = False,
+) -> dict[str, dict]:
+    """Reads the size of every static image and provides its downscaled variants.
+
+    Variants are generated once per source hash and width into
+    cache_dir_path, on `jobs` worker processes, then hardlinked (or copied)
+    into the output directory. Widths at or above an image's own width are
+    skipped. Without Pillow, only sizes are read. An image whose size and
+    mtime match `digests` is not hashed again.
+
+    Args:
+        source_dir_path (Path): The static directory.
+        dest_dir_path (Path): The output directory.
+        cache_dir_path (Path): Where generated variants are kept between builds.
+        static_files (Iterable[str]): POSIX paths of the static files, relative
+            to source_dir_path, e.g. the keys of sync_static's result.
+        widths (Iterable[int], optional): Variant widths in pixels. Defaults to none.
+        jobs (int, optional): Number of worker processes for variants. Defaults to 1.
+        digests (dict[str, list] | None, optional): stat_digest results of the
+            images with variants, keyed by their static path, as recorded by the
+            previous build. Updated in place to describe this build's images.
+        checksum (bool, optional): Hash every image with variants. Defaults to False.
+
+    Returns:
+        dict[str, dict]: Keyed by root-relative URL, each image's "width" and
+            "height" and, if it has any, its "variants" as [width, URL] pairs.
+    """
+    if widths and Image is None:
+        print("warning: Pillow is not installed, so no image variants are generated")
+        widths = ()
+    images = {}
+    to_make = []
+    to_link = []
+    previous_digests = dict(digests or {})
+    if digests is not None:
+        digests.clear()
+
+    for rel_path in sorted(static_files):
+        suffix = Path(rel_path).suffix.lower()
+        if suffix not in IMAGE_SUFFIXES:
+            continue
+        from_path = source_dir_path / rel_path
+        size = read_image_size(from_path)
+        if size is None:
+            continue
+        image = {"width": size[0], "height": size[1]}
+        images[f"/{rel_path}"] = image
+        variant_widths = [width for width in widths if width < size[0]] if suffix in VARIANT_SUFFIXES else []
+        if not variant_widths:
+            continue
+        known = stat_digest(from_path, previous_digests.get(rel_path), checksum)
+        if digests is not None:
+            digests[rel_path] = known
+        digest = known[2]
+        image["variants"] = []
+        for width in variant_widths:
+            cache_path = cache_dir_path / f"{digest}-{width}{suffix}"
+            dest_rel_path = variant_path(rel_path, digest, width)
+            if not cache_path.exists():
+                to_make.append((from_path, cache_path, width))
+            to_link.append((cache_path, dest_dir_path / dest_rel_path))
+            image["variants"].append([width, f"/{dest_rel_path}"])
+
+    if to_make:
+        cache_dir_path.mkdir(parents=True, exist_ok=True)
+    if jobs > 1 and len(to_make) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            list(executor.map(make_variant, to_make))
+    else:
+        for task in to_make:
+            make_variant(task)
+
+    for cache_path, dest_path in to_link:
+        if not is_unchanged(cache_path, cache_path.stat(), dest_path):
+            copy_file(cache_path, dest_path, link=True)
+
+    print(f" * {len(images)} images, {len(to_link)} variants ({len(to_make)} generated)")
+
+    return images
+
+
+def remove_stale_variants(dest_dir_path: Path, previous_images, images) -> list[Path]:
+    """Deletes variants written by a previous build that this build no longer uses.
+
+    Args:
+        dest_dir_path (Path): The output directory.
+        previous_images (dict[str, dict] | None): The previous build's collect_images result.
+        images (dict[str, dict] | None): This build's, or None if images are not processed.
+
+    Returns:
+        list[Path]: The files that were removed.
+    """
+
+    def variant_urls(entries):
+        return {url for image in (entries or {}).values() for _, url in image.get("variants", [])}
+
+    removed = []
+
+    for url in sorted(variant_urls(previous_images) - variant_urls(images)):
+        path = dest_dir_path / url[1:]
+        if path.is_file():
+            path.unlink()
+            removed.append(path)
+
+    return removed
+
+
+def image_attributes_html(url: str, image: dict, rewrite_url=None) -> str:
+    """Formats the attributes added to an <img> showing a known image.
+
+    Args:
+        url (str): The image's root-relative URL.
+        image (dict): Its collect_images entry.
+        rewrite_url (Callable[[str], str] | None, optional): Applied to the
+            URLs in srcset, as write_html does for src.
+
+    Returns:
+        str: Attributes starting with a space: width, height, srcset and
+            sizes when there are variants, loading and decoding.
+    """
+    rewrite = rewrite_url or str
+    width = image["width"]
+    attributes = f' width="{width}" height="{image["height"]}"'
+
+    if image.get("variants"):
+        candidates = [f"{rewrite(variant_url)} {variant_width}w" for variant_width, variant_url in image["variants"]]
+        candidates.append(f"{rewrite(url)} {width}w")
+        attributes += (
+            f' srcset="{escape_attribute(", ".join(candidates))}"'
+            f' sizes="(max-width: {width}px) 100vw, {width}px"'
+        )
+
+    return attributes + LAZY_ATTRIBUTES
+
+
+def image_attributes(table: dict[str, str], src: str) -> str:
+    """Returns the attributes for an <img> from a precomputed table, keyed by its src."""
+    return table.get(src, LAZY_ATTRIBUTES)
+
+
+def image_attribute_writer(images: dict[str, dict] | None, rewrite_url=None):
+    """Returns the image hook passed to write_html alongside the URL rewriter.
+
+    Every image's attributes are formatted once, so serializing an <img>
+    is a dictionary lookup. Images that are not in `images`, such as
+    external ones, only get loading and decoding.
+
+    Args:
+        images (dict[str, dict] | None): The collect_images result.
+        rewrite_url (Callable[[str], str] | None, optional): The template's URL rewriter.
+
+    Returns:
+        Callable[[str], str] | None: The hook, or None when images are not processed.
+    """
+    if images is None:
+        return None
+    table = {url: image_attributes_html(url, image, rewrite_url) for url, image in images.items()}
+
+    return partial(image_attributes, table)
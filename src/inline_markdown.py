@@ -2,18 +2,87 @@ import re
 
 from text_node import TextNode, TextType
 
+INLINE_DELIMITERS = {
+    "**": TextType.BOLD,
+    "_": TextType.ITALIC,
+    "`": TextType.CODE,
+}
+INLINE_SPECIAL = re.compile(r"\*\*|[_`!\[]")
+IMAGE_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_PATTERN = re.compile(r"\[([^\[\]]*)\]\(([^\(\)]*)\)")
+
 
 def text_to_textnodes(text):
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+    """Tokenizes inline markdown into TextNodes in a single left-to-right scan.
+
+    Produces the same nodes as chaining split_nodes_delimiter for `**`, `_`
+    and backticks with split_nodes_image and split_nodes_link, except that
+    delimiters inside code spans, images and links are left alone instead of
+    being split by an earlier pass.
+
+    Raises:
+        ValueError: If a bold, italic or code delimiter is not closed.
+    """
+    nodes = []
+    plain = []
+    pos = 0
+    length = len(text)
+
+    while pos < length:
+        match = INLINE_SPECIAL.search(text, pos)
+
+        if match is None:
+            plain.append(text[pos:])
+            break
+        start = match.start()
+        token = match.group()
+
+        if start > pos:
+            plain.append(text[pos:start])
+
+        if token in INLINE_DELIMITERS:
+            content_start = start + len(token)
+            end = text.find(token, content_start)
+
+            if end == -1:
+                raise ValueError("invalid markdown, formatted section not closed")
+            if end > content_start:
+                _flush_plain(nodes, plain)
+                nodes.append(TextNode(text[content_start:end], INLINE_DELIMITERS[token]))
+            pos = end + len(token)
+            continue
+
+        if token == "!":
+            image = IMAGE_PATTERN.match(text, start)
+
+            if image is not None:
+                _flush_plain(nodes, plain)
+                nodes.append(TextNode(image.group(1), TextType.IMAGE, image.group(2)))
+                pos = image.end()
+                continue
+        elif start == 0 or text[start - 1] != "!":
+            link = LINK_PATTERN.match(text, start)
+
+            if link is not None:
+                _flush_plain(nodes, plain)
+                nodes.append(TextNode(link.group(1), TextType.LINK, link.group(2)))
+                pos = link.end()
+                continue
+
+        plain.append(token)
+        pos = start + 1
+
+    _flush_plain(nodes, plain)
 
     return nodes
 
 
+def _flush_plain(nodes, plain):
+    if plain:
+        nodes.append(TextNode("".join(plain), TextType.TEXT))
+        plain.clear()
+
+
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     new_nodes = []
 
@@ -1,31 +1,202 @@
-import shutil
-import sys
+import argparse
 from pathlib import Path
-from copy_static import copy_files_recursive
+from ast_cache import AstCache, DEFAULT_MAX_BYTES
+from build_manifest import BuildManifest, hash_file
+from copy_static import asset_urls, sync_static
 from generate_content import generate_pages_recursive
+from images import collect_images, parse_widths, remove_stale_variants
+from markdown_blocks import set_inline_cache_size
+from precompress import DEFAULT_BROTLI_LEVEL, DEFAULT_GZIP_LEVEL, precompress, remove_siblings
+from profiling import Profiler
+from site_files import write_site_files
+from site_index import DEFAULT_INCLUDE
 
-default_base_path = Path("/")
+default_base_path = "/"
 dir_path_static = Path("static")
 dir_path_public = Path("public")
 dir_path_content = Path("content")
+dir_path_cache = Path(".cache")
 template_path = Path("template.html")
+manifest_path = dir_path_cache / "manifest.json"
+dir_path_ast_cache = dir_path_cache / "ast"
+dir_path_image_cache = dir_path_cache / "images"
 
 
-def main():
-    base_path = default_base_path
+def build_parser():
+    parser = argparse.ArgumentParser(description="Generate the static site into public/.")
+    parser.add_argument("base_path", nargs="?", default=default_base_path,
+                        help="URL prefix the site is served under (default: /)")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="number of worker processes used to render pages (default: 1)")
+    parser.add_argument("--io-threads", type=int, default=0, metavar="N",
+                        help="with a single job, prefetch sources and write pages on N I/O threads "
+                             "instead of streaming each page (default: off)")
+    parser.add_argument("--include", action="append", metavar="GLOB",
+                        help="only render content files matching GLOB (repeatable, default: *.md)")
+    parser.add_argument("--exclude", action="append", default=[], metavar="GLOB",
+                        help="skip content files matching GLOB (repeatable)")
+    parser.add_argument("--cache", action=argparse.BooleanOptionalAction, default=False,
+                        help="keep parsed markdown trees in .cache/ast, so pages re-rendered after a "
+                             "template or option change skip parsing; this slows down cold builds, "
+                             "which write one file per page (default: off)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help="size cap of the parsed-tree cache in MiB, with --cache (default: %(default)s)")
+    parser.add_argument("--inline-cache", type=int, default=0, metavar="N",
+                        help="reuse the rendered nodes of the N most recently seen inline texts "
+                             "and report hit rates (default: off)")
+    parser.add_argument("--checksum-static", action="store_true",
+                        help="compare static files, and hash images with variants, by content "
+                             "instead of trusting an unchanged size and mtime")
+    parser.add_argument("--link-static", action="store_true",
+                        help="hardlink static files into public/ instead of copying them")
+    parser.add_argument("--fingerprint", action="store_true",
+                        help="also copy static assets under content-hashed names (index.<hash>.css) "
+                             "and point href and src attributes in pages and the template at them; "
+                             "the plain names stay for url() in CSS, script imports and outside links")
+    parser.add_argument("--minify", action="store_true",
+                        help="strip comments and redundant whitespace from the template, "
+                             "leaving <pre>, <textarea>, <script> and <style> intact")
+    parser.add_argument("--images", action="store_true",
+                        help="add width, height, loading=lazy and decoding=async to <img> tags, "
+                             "reading sizes from the headers of images in static/")
+    parser.add_argument("--image-widths", type=parse_widths, metavar="WIDTHS",
+                        help="comma-separated widths, e.g. 480,960, to downscale static images to "
+                             "and list in srcset; needs Pillow and implies --images")
+    parser.add_argument("--site-url", metavar="URL",
+                        help="scheme and host the site is published at, e.g. https://example.com; "
+                             "enables sitemap.xml and feed.xml")
+    parser.add_argument("--search-index", action="store_true",
+                        help="write search-index.json, an inverted index for client-side search")
+    parser.add_argument("--precompress", action="store_true",
+                        help="write .gz (and .br, if brotli is installed) next to every HTML, CSS, JS, "
+                             "XML, JSON and SVG file in public/ whose contents changed")
+    parser.add_argument("--gzip-level", type=int, choices=range(1, 10), default=DEFAULT_GZIP_LEVEL, metavar="N",
+                        help="gzip level for --precompress, 1-9 (default: %(default)s)")
+    parser.add_argument("--brotli-level", type=int, choices=range(12), default=DEFAULT_BROTLI_LEVEL, metavar="N",
+                        help="brotli quality for --precompress, 0-11 (default: %(default)s)")
+    parser.add_argument("--profile", action="store_true",
+                        help="time every stage of every rendered page and print a report")
+    parser.add_argument("--profile-top", type=int, default=10, metavar="N",
+                        help="number of slowest pages listed in the profile report (default: %(default)s)")
+    parser.add_argument("--trace", type=Path, metavar="FILE",
+                        help="with --profile, also write a Chrome trace-event JSON file")
 
-    if len(sys.argv) > 1:
-        base_path = Path(sys.argv[1])
+    return parser
 
-    print("Deleting public directory...")
-    if dir_path_public.exists():
-        shutil.rmtree(dir_path_public)
 
-    print("Copying static files to public directory...")
-    copy_files_recursive(dir_path_static, dir_path_public)
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    build(args)
+
+
+def make_ast_cache(args):
+    if not args.cache:
+        return None
+
+    return AstCache(dir_path_ast_cache, args.cache_size * 1024 * 1024)
+
+
+def wants_images(args) -> bool:
+    return bool(args.images or args.image_widths)
+
+
+def wants_site_files(args) -> bool:
+    return bool(args.site_url or args.search_index)
+
+
+def write_site_outputs(args, manifest) -> None:
+    """Writes the sitemap, feed and search index requested on the command line."""
+    if not wants_site_files(args):
+        return
+    for path in write_site_files(manifest.pages, dir_path_public, args.base_path, args.site_url, args.search_index):
+        print(f" * wrote {path}")
+
+
+def compress_outputs(args, manifest) -> None:
+    """Updates the precompressed siblings of public/, or removes them without --precompress."""
+    if args.precompress:
+        print("Compressing output files...")
+        manifest.compressed = precompress(
+            dir_path_public, manifest.compressed, args.gzip_level, args.brotli_level, args.jobs
+        )
+    elif manifest.compressed:
+        remove_siblings(dir_path_public, manifest.compressed.get("files", {}))
+        manifest.compressed = {}
+
+
+def build(args):
+    base_path = args.base_path
+
+    manifest = BuildManifest(manifest_path, hash_file(template_path), base_path)
+
+    print("Syncing static files to public directory...")
+    manifest.static_files = sync_static(
+        dir_path_static,
+        dir_path_public,
+        manifest.static_files,
+        checksum=args.checksum_static,
+        link=args.link_static,
+        fingerprint=args.fingerprint,
+    )
+    manifest.use_assets(asset_urls(manifest.static_files))
+
+    images = None
+    if wants_images(args):
+        print("Reading images...")
+        images = collect_images(
+            dir_path_static,
+            dir_path_public,
+            dir_path_image_cache,
+            manifest.static_files,
+            args.image_widths or (),
+            args.jobs,
+            manifest.image_digests,
+            args.checksum_static,
+        )
+    for removed_path in remove_stale_variants(dir_path_public, manifest.images, images):
+        print(f" - removed {removed_path}")
+    manifest.use_images(images)
+    manifest.use_minify(args.minify)
 
     print("Generating content...")
-    generate_pages_recursive(dir_path_content, template_path, dir_path_public, base_path)
+    ast_cache = make_ast_cache(args)
+    set_inline_cache_size(args.inline_cache)
+    profiler = Profiler() if args.profile else None
+    generate_pages_recursive(
+        dir_path_content,
+        template_path,
+        dir_path_public,
+        base_path,
+        manifest=manifest,
+        jobs=args.jobs,
+        ast_cache=ast_cache,
+        profiler=profiler,
+        io_threads=args.io_threads,
+        include=args.include or DEFAULT_INCLUDE,
+        exclude=args.exclude,
+        summarize=wants_site_files(args),
+        assets=manifest.assets,
+        images=manifest.images,
+        minify=args.minify,
+    )
+
+    for removed_path in manifest.prune():
+        print(f" - removed {removed_path}")
+    write_site_outputs(args, manifest)
+    compress_outputs(args, manifest)
+    manifest.save()
+
+    if ast_cache is not None:
+        ast_cache.trim()
+
+    if profiler is not None:
+        print()
+        print(profiler.report(args.profile_top))
+        if args.trace is not None:
+            profiler.write_trace(args.trace)
+            print(f"Wrote trace to {args.trace}")
+
+    return manifest
 
 
 if __name__ == "__main__":
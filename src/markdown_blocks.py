@@ -1,9 +1,18 @@
+from array import array
+from collections.abc import Iterable, Iterator
 from enum import Enum
+from functools import lru_cache
 
-from html_node import ParentNode
+from highlight import highlight, resolve_language
+from html_node import URL_PROPS, FrozenLeafNode, LeafNode, ParentNode
 from inline_markdown import text_to_textnodes
 from text_node import text_node_to_html_node, TextNode, TextType
 
+# Bump whenever parsing changes what markdown_to_html_node produces, so cached
+# trees from older parsers are ignored. If the rendered HTML changes too, also
+# bump build_manifest.RENDER_VERSION so existing pages are re-rendered.
+PARSER_VERSION = 4
+
 
 class BlockType(Enum):
     PARAGRAPH = "paragraph"
@@ -23,16 +32,117 @@ def markdown_to_blocks(markdown: str) -> list[str]:
     Returns:
         list[str]: A list of block strings separated by blank lines.
     """
-    blocks = markdown.split("\n\n")
-    filtered_blocks = []
+    return list(iter_blocks(markdown.split("\n")))
+
+
+def iter_blocks(lines: Iterable[str]) -> Iterator[str]:
+    """Groups lines into markdown blocks as they are read.
+
+    Blocks are separated by blank lines, except inside a code fence, which
+    runs from an opening ``` line to the next line starting with ```. A line
+    that opens and closes a fence, such as ```x```, does not start one, and
+    a fence that is never closed is split at blank lines like other text.
+
+    Args:
+        lines (Iterable[str]): Lines of markdown, e.g. an open file. Trailing
+            newlines are ignored.
+
+    Yields:
+        str: Each block with surrounding whitespace stripped.
+    """
+    block = []
+    in_code = False
 
-    for block in blocks:
-        if block == "":
+    for line in lines:
+        line = line.rstrip("\n")
+
+        if in_code:
+            block.append(line)
+            if line.startswith("```"):
+                yield "\n".join(block).strip()
+                block = []
+                in_code = False
+            continue
+        if line.strip() == "":
+            if block:
+                yield "\n".join(block).strip()
+                block = []
             continue
-        block = block.strip()
-        filtered_blocks.append(block)
+        if not block and line.lstrip().startswith("```") and "```" not in line.lstrip()[3:]:
+            in_code = True
+        block.append(line)
+
+    if in_code:
+        yield from _split_at_blank_lines(block)
+    elif block:
+        yield "\n".join(block).strip()
+
+
+def _split_at_blank_lines(lines: list[str]) -> Iterator[str]:
+    block = []
+
+    for line in lines:
+        if line.strip() == "":
+            if block:
+                yield "\n".join(block).strip()
+                block = []
+            continue
+        block.append(line)
+
+    if block:
+        yield "\n".join(block).strip()
+
+
+HEADING_PREFIXES = ("# ", "## ", "### ", "#### ", "##### ", "###### ")
+OLIST_PREFIXES = tuple(f"{i}. " for i in range(1, 1000))
 
-    return filtered_blocks
+BLOCK_TYPES = tuple(BlockType)
+BLOCK_CODES = {block_type: code for code, block_type in enumerate(BLOCK_TYPES)}
+_PARAGRAPH = BLOCK_CODES[BlockType.PARAGRAPH]
+_HEADING = BLOCK_CODES[BlockType.HEADING]
+_CODE = BLOCK_CODES[BlockType.CODE]
+_QUOTE = BLOCK_CODES[BlockType.QUOTE]
+_ULIST = BLOCK_CODES[BlockType.ULIST]
+_OLIST = BLOCK_CODES[BlockType.OLIST]
+
+
+def _block_code(block: str) -> int:
+    first = block[:1]
+
+    if first == "#":
+        return _HEADING if block.startswith(HEADING_PREFIXES) else _PARAGRAPH
+    if first == "`":
+        last_line = block.rfind("\n") + 1
+        return _CODE if last_line and block.startswith("```") and block.startswith("```", last_line) else _PARAGRAPH
+    # Every line has the prefix when every newline is followed by it.
+    if first == ">":
+        return _QUOTE if block.count("\n>") == block.count("\n") else _PARAGRAPH
+    if first == "-":
+        return _ULIST if block.startswith("- ") and block.count("\n- ") == block.count("\n") else _PARAGRAPH
+    if first == "1" and block.startswith("1. "):
+        lines = block.split("\n")
+        prefixes = OLIST_PREFIXES if len(lines) <= len(OLIST_PREFIXES) else [f"{i}. " for i in range(1, len(lines) + 1)]
+        if all(map(str.startswith, lines, prefixes)):
+            return _OLIST
+
+    return _PARAGRAPH
+
+
+def classify_blocks(blocks: Iterable[str]) -> array:
+    """Determines the block type of every block in a document at once.
+
+    Blocks are dispatched on their first character. Quotes and unordered
+    lists are checked by counting line-start markers without splitting the
+    block, and ordered lists are matched against precomputed item prefixes
+    instead of formatting one per line.
+
+    Args:
+        blocks (Iterable[str]): Markdown blocks, e.g. from markdown_to_blocks.
+
+    Returns:
+        array: One unsigned byte per block, indexing into BLOCK_TYPES.
+    """
+    return array("B", map(_block_code, blocks))
 
 
 def block_to_block_type(block: str) -> BlockType:
@@ -44,31 +154,7 @@ def block_to_block_type(block: str) -> BlockType:
     Returns:
         BlockType: The type of the markdown block.
     """
-    lines = block.split("\n")
-
-    if block.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
-        return BlockType.HEADING
-    if len(lines) > 1 and lines[0].startswith("```") and lines[-1].startswith("```"):
-        return BlockType.CODE
-    if block.startswith(">"):
-        for line in lines:
-            if not line.startswith(">"):
-                return BlockType.PARAGRAPH
-        return BlockType.QUOTE
-    if block.startswith("- "):
-        for line in lines:
-            if not line.startswith("- "):
-                return BlockType.PARAGRAPH
-        return BlockType.ULIST
-    if block.startswith("1. "):
-        i = 1
-        for line in lines:
-            if not line.startswith(f"{i}. "):
-                return BlockType.PARAGRAPH
-            i += 1
-        return BlockType.OLIST
-
-    return BlockType.PARAGRAPH
+    return BLOCK_TYPES[_block_code(block)]
 
 
 def markdown_to_html_node(markdown: str) -> ParentNode:
@@ -81,25 +167,60 @@ def markdown_to_html_node(markdown: str) -> ParentNode:
         ParentNode: A root HTML node representing the parsed markdown.
     """
     blocks = markdown_to_blocks(markdown)
-    children = []
-
-    for block in blocks:
-        html_node = block_to_html_node(block)
-        children.append(html_node)
+    children = [
+        block_to_html_node(block, BLOCK_TYPES[code]) for block, code in zip(blocks, classify_blocks(blocks))
+    ]
 
     return ParentNode("div", children, None)
 
 
-def block_to_html_node(block: str) -> ParentNode:
+def iter_html_nodes(lines: Iterable[str]) -> Iterator[ParentNode]:
+    """Parses markdown lines into block-level HTML nodes, one block at a time.
+
+    Args:
+        lines (Iterable[str]): Lines of markdown, e.g. an open file.
+
+    Yields:
+        ParentNode: The HTML node for each block.
+    """
+    for block in iter_blocks(lines):
+        yield block_to_html_node(block)
+
+
+def write_markdown_html(lines: Iterable[str], out, rewrite_url=None, on_block=None, image_attrs=None) -> None:
+    """Streams markdown lines to a text stream as the HTML of a root <div>.
+
+    Only one block is held in memory at a time, so arbitrarily large files
+    can be converted.
+
+    Args:
+        lines (Iterable[str]): Lines of markdown, e.g. an open file.
+        out: Any object with a `write(str)` method.
+        rewrite_url (Callable[[str], str] | None, optional): Applied to href and src values.
+        on_block (Callable[[ParentNode], None] | None, optional): Called with each
+            block node after it is written, e.g. PageSummary.add.
+        image_attrs (Callable[[str], str] | None, optional): Adds attributes to <img> tags.
+    """
+    out.write("<div>")
+    for html_node in iter_html_nodes(lines):
+        html_node.write_html(out, rewrite_url, image_attrs)
+        if on_block is not None:
+            on_block(html_node)
+    out.write("</div>")
+
+
+def block_to_html_node(block: str, block_type: BlockType | None = None) -> ParentNode:
     """Converts a markdown block to its corresponding HTML node.
 
     Args:
         block (str): A single block of markdown.
+        block_type (BlockType | None, optional): The block's type, if already known.
 
     Returns:
         ParentNode: An HTML representation of the block.
     """
-    block_type = block_to_block_type(block)
+    if block_type is None:
+        block_type = block_to_block_type(block)
 
     if block_type == BlockType.PARAGRAPH:
         return paragraph_to_html_node(block)
@@ -126,6 +247,9 @@ def text_to_children(text: str) -> list:
     Returns:
         list: A list of HTML nodes representing the inline content.
     """
+    if _inline_cache is not None:
+        return list(_inline_cache(text))
+
     text_nodes = text_to_textnodes(text)
     children = []
 
@@ -136,6 +260,61 @@ def text_to_children(text: str) -> list:
     return children
 
 
+_inline_cache = None
+
+
+def _render_inline(text: str) -> tuple[FrozenLeafNode, ...]:
+    """Renders inline markdown into immutable nodes for the inline cache.
+
+    Runs of nodes without href/src props are serialized (and escaped) once
+    and stored as a single raw HTML fragment. Links and images stay as nodes so base-path
+    rewriting still applies to them at write time.
+    """
+    nodes = []
+    fragment = []
+
+    for text_node in text_to_textnodes(text):
+        html_node = text_node_to_html_node(text_node)
+        if html_node.props is not None and not URL_PROPS.isdisjoint(html_node.props):
+            if fragment:
+                nodes.append(FrozenLeafNode(None, "".join(fragment), raw=True))
+                fragment = []
+            nodes.append(FrozenLeafNode(html_node.tag, html_node.value, html_node.props))
+        else:
+            fragment.append(html_node.to_html())
+    if fragment:
+        nodes.append(FrozenLeafNode(None, "".join(fragment), raw=True))
+
+    return tuple(nodes)
+
+
+def set_inline_cache_size(maxsize: int) -> None:
+    """Enables, resizes or disables the inline rendering cache.
+
+    With the cache enabled, text_to_children keeps the rendered nodes of the
+    `maxsize` most recently used inline texts and returns shared, immutable
+    nodes for repeated ones. Resizing starts with an empty cache.
+
+    Args:
+        maxsize (int): Number of inline texts to keep; 0 disables the cache.
+    """
+    global _inline_cache
+
+    _inline_cache = lru_cache(maxsize=maxsize)(_render_inline) if maxsize > 0 else None
+
+
+def inline_cache_info():
+    """Returns the inline cache's hits, misses, maxsize and current size.
+
+    Returns:
+        functools._CacheInfo | None: The statistics, or None if the cache is disabled.
+    """
+    if _inline_cache is None:
+        return None
+
+    return _inline_cache.cache_info()
+
+
 def paragraph_to_html_node(block: str) -> ParentNode:
     """Converts a paragraph block into an HTML <p> element.
 
@@ -179,6 +358,10 @@ def heading_to_html_node(block: str) -> ParentNode:
 def code_to_html_node(block: str) -> ParentNode:
     """Converts a code block into an HTML <pre><code> block.
 
+    The first word of the info string after the opening fence names the
+    language. The <code> element gets a `language-NAME` class, and supported
+    languages are highlighted (see highlight.py).
+
     Args:
         block (str): A code block in markdown.
 
@@ -188,10 +371,19 @@ def code_to_html_node(block: str) -> ParentNode:
     if not block.startswith("```") or not block.endswith("```"):
         raise ValueError("invalid code block")
 
-    text = block[4:-3]
-    raw_text_node = TextNode(text, TextType.TEXT)
-    child = text_node_to_html_node(raw_text_node)
-    code = ParentNode("code", [child])
+    first_line_end = block.find("\n")
+    if first_line_end == -1:
+        info, text = "", block[3:-3]
+    else:
+        info, text = block[3:first_line_end].strip(), block[first_line_end + 1:-3]
+    language = resolve_language(info)
+    props = {"class": f"language-{info.split()[0]}"} if info else None
+
+    if language is None:
+        child = text_node_to_html_node(TextNode(text, TextType.TEXT))
+    else:
+        child = LeafNode(None, highlight(text, language), raw=True)
+    code = ParentNode("code", [child], props)
 
     return ParentNode("pre", [code])
 
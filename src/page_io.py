@@ -0,0 +1,216 @@
+import hashlib
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+DEFAULT_IO_THREADS = 8
+HASH_BUFFER_CHARS = 1 << 16
+
+
+def same_contents(path_a: Path, path_b: Path) -> bool:
+    """Checks whether two files hold the same bytes, comparing sizes first.
+
+    Args:
+        path_a (Path): A file.
+        path_b (Path): Another file, which may not exist.
+
+    Returns:
+        bool: True if both exist and are byte-for-byte equal.
+    """
+    try:
+        if path_a.stat().st_size != path_b.stat().st_size:
+            return False
+        with open(path_a, "rb") as file_a, open(path_b, "rb") as file_b:
+            for chunk in iter(lambda: file_a.read(1 << 16), b""):
+                if chunk != file_b.read(len(chunk)):
+                    return False
+    except FileNotFoundError:
+        return False
+
+    return True
+
+
+class _HashingWriter:
+    """Passes text through to a file while hashing it, in buffered batches."""
+
+    def __init__(self, dest_file) -> None:
+        self._dest_file = dest_file
+        self._digest = hashlib.sha256()
+        self._parts = []
+        self._chars = 0
+
+    def write(self, text: str) -> None:
+        self._parts.append(text)
+        self._chars += len(text)
+        if self._chars >= HASH_BUFFER_CHARS:
+            self.flush()
+
+    def flush(self) -> None:
+        text = "".join(self._parts)
+        self._dest_file.write(text)
+        self._digest.update(text.encode())
+        self._parts = []
+        self._chars = 0
+
+    def hexdigest(self) -> str:
+        self.flush()
+        return self._digest.hexdigest()
+
+
+def same_size(path_a: Path, path_b: Path) -> bool:
+    """Checks whether two files exist and have the same size."""
+    try:
+        return path_a.stat().st_size == path_b.stat().st_size
+    except FileNotFoundError:
+        return False
+
+
+def write_atomic(dest_path: Path, write, previous_hash: str | None = None) -> tuple[bool, str]:
+    """Writes a file through a temporary sibling and renames it into place.
+
+    Parent directories are only created when the first open fails, so a
+    build whose directories were made up front (see make_output_dirs) does
+    no per-file mkdir calls. If the file already holds exactly the new
+    contents, it is left untouched so its mtime still says when it last
+    changed, which is what rsync and CDN uploads go by.
+
+    The contents are hashed as they are written. When the hash recorded for
+    the existing file is given, comparing it (and the sizes) decides
+    whether the file changed; only without one are both files read back
+    and compared byte by byte.
+
+    Args:
+        dest_path (Path): The file to write.
+        write: Callable that writes the contents to the file-like object it is given.
+        previous_hash (str | None, optional): The hash returned when dest_path
+            was last written, e.g. from the build manifest.
+
+    Returns:
+        tuple[bool, str]: True if the file was replaced, False if it was
+            already up to date, and the hex SHA-256 digest of the contents.
+    """
+    tmp_path = dest_path.with_name(dest_path.name + ".tmp")
+
+    try:
+        dest_file = open(tmp_path, "w")
+    except FileNotFoundError:
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        dest_file = open(tmp_path, "w")
+    try:
+        with dest_file:
+            writer = _HashingWriter(dest_file)
+            write(writer)
+            output_hash = writer.hexdigest()
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    if previous_hash is not None:
+        unchanged = output_hash == previous_hash and same_size(tmp_path, dest_path)
+    else:
+        unchanged = same_contents(tmp_path, dest_path)
+    if unchanged:
+        tmp_path.unlink()
+        return False, output_hash
+    tmp_path.replace(dest_path)
+
+    return True, output_hash
+
+
+def make_output_dirs(dest_paths) -> None:
+    """Creates the parent directories of many output files in one pass.
+
+    Only the deepest directories are created explicitly; their ancestors
+    come along with parents=True.
+
+    Args:
+        dest_paths (Iterable[Path]): Files that are about to be written.
+    """
+    dirs = {dest_path.parent for dest_path in dest_paths}
+    ancestors = {ancestor for dir_path in dirs for ancestor in dir_path.parents}
+
+    for dir_path in sorted(dirs - ancestors):
+        dir_path.mkdir(parents=True, exist_ok=True)
+
+
+def prefetch(paths, threads: int = DEFAULT_IO_THREADS, lookahead: int | None = None):
+    """Reads files concurrently, yielding their contents in order.
+
+    At most `lookahead` reads are in flight or buffered at once, so memory
+    stays bounded while file latency overlaps with whatever the caller does
+    between iterations.
+
+    Args:
+        paths (Iterable[Path]): Files to read.
+        threads (int, optional): Reader threads. Defaults to DEFAULT_IO_THREADS.
+        lookahead (int | None, optional): Reads kept ahead of the consumer. Defaults to 4 * threads.
+
+    Yields:
+        str: The contents of each file.
+    """
+    lookahead = lookahead or threads * 4
+    paths = iter(paths)
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        pending = deque(executor.submit(Path.read_text, path) for path in islice(paths, lookahead))
+
+        while pending:
+            contents = pending.popleft().result()
+            next_path = next(paths, None)
+            if next_path is not None:
+                pending.append(executor.submit(Path.read_text, next_path))
+            yield contents
+
+
+class BackgroundWriter:
+    """Writes files on a thread pool with a bound on queued writes.
+
+    submit() blocks once `max_pending` writes are outstanding, so rendering
+    can run ahead of the disk without buffering the whole site. The first
+    write error is raised from submit() or close().
+    """
+
+    def __init__(self, threads: int = DEFAULT_IO_THREADS, max_pending: int | None = None) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=threads)
+        self._slots = threading.BoundedSemaphore(max_pending or threads * 4)
+        self._error = None
+
+    def submit(self, dest_path: Path, text: str, previous_hash: str | None = None) -> None:
+        """Queues a file write.
+
+        Args:
+            dest_path (Path): The file to write.
+            text (str): Its contents.
+            previous_hash (str | None, optional): Passed on to write_atomic.
+        """
+        self._raise_error()
+        self._slots.acquire()
+        future = self._executor.submit(
+            write_atomic, dest_path, lambda dest_file: dest_file.write(text), previous_hash
+        )
+        future.add_done_callback(lambda done: self._finished(dest_path, done))
+
+    def _finished(self, dest_path: Path, future) -> None:
+        self._slots.release()
+        error = future.exception()
+        if error is not None and self._error is None:
+            self._error = OSError(f"{dest_path}: {error}")
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def close(self) -> None:
+        """Waits for queued writes and raises the first error, if any."""
+        self._executor.shutdown(wait=True)
+        self._raise_error()
+
+    def __enter__(self) -> "BackgroundWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._executor.shutdown(wait=True)
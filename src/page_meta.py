@@ -0,0 +1,101 @@
+import io
+from pathlib import Path
+
+FRONT_MATTER_DELIMITER = "---"
+
+
+def parse_value(value: str):
+    """Converts a front matter value into a bool, list or string.
+
+    Supports `true`/`false`, `[a, b]` lists and optionally quoted strings,
+    which covers the keys pages use (title, date, tags, draft, template).
+
+    Args:
+        value (str): The raw value after the colon.
+
+    Returns:
+        bool | list[str] | str: The parsed value.
+    """
+    value = value.strip()
+
+    if value.lower() in ("true", "false"):
+        return value.lower() == "true"
+    if value.startswith("[") and value.endswith("]"):
+        return [parse_value(item) for item in value[1:-1].split(",") if item.strip()]
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+
+    return value
+
+
+def read_header(file) -> tuple[dict, int]:
+    """Reads a page's front matter and title without reading the rest of it.
+
+    Front matter is an optional block of `key: value` lines between two
+    `---` lines at the very top of the file. The title is the front matter
+    `title` if present, otherwise the first `# ` line; reading stops as soon
+    as it is found.
+
+    Args:
+        file: An open text file or StringIO positioned at the start.
+
+    Raises:
+        ValueError: If the front matter is not closed or no title is found.
+
+    Returns:
+        tuple[dict, int]: The metadata (always including "title") and the
+            stream position where the markdown body starts.
+    """
+    meta = {}
+    body_pos = 0
+    line = file.readline()
+
+    if line.rstrip("\n") == FRONT_MATTER_DELIMITER:
+        for line in iter(file.readline, ""):
+            if line.rstrip("\n") == FRONT_MATTER_DELIMITER:
+                break
+            key, sep, value = line.partition(":")
+            if sep:
+                meta[key.strip()] = parse_value(value)
+        else:
+            raise ValueError("invalid front matter: no closing ---")
+        body_pos = file.tell()
+        line = file.readline()
+
+    if "title" not in meta:
+        while line:
+            if line.startswith("# "):
+                meta["title"] = line[2:].rstrip("\n")
+                break
+            line = file.readline()
+        else:
+            raise ValueError("no title found")
+
+    return meta, body_pos
+
+
+def split_front_matter(markdown: str) -> tuple[dict, str]:
+    """Separates a page held in memory into its metadata and markdown body.
+
+    Args:
+        markdown (str): The whole page.
+
+    Returns:
+        tuple[dict, str]: The metadata and the body after any front matter.
+    """
+    meta, body_pos = read_header(io.StringIO(markdown))
+
+    return meta, markdown[body_pos:]
+
+
+def read_page_meta(path: Path) -> dict:
+    """Reads only the header of a page file and returns its metadata.
+
+    Args:
+        path (Path): The markdown file.
+
+    Returns:
+        dict: The page's metadata, including its title.
+    """
+    with open(path, "r") as page_file:
+        return read_header(page_file)[0]
@@ -0,0 +1,133 @@
+import gzip
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from build_manifest import stat_digest
+from copy_static import list_files
+
+try:
+    import brotli
+except ImportError:  # .br files are only written when brotli is installed.
+    brotli = None
+
+COMPRESS_SUFFIXES = frozenset((".html", ".css", ".js", ".xml", ".json", ".svg"))
+DEFAULT_GZIP_LEVEL = 9
+DEFAULT_BROTLI_LEVEL = 11
+
+
+def sibling_suffixes(brotli_level: int | None) -> tuple[str, ...]:
+    """Returns the suffixes of the compressed copies written next to each file."""
+    return (".gz", ".br") if brotli_level is not None else (".gz",)
+
+
+def _write_sibling(path: Path, suffix: str, data: bytes) -> None:
+    sibling = path.with_name(path.name + suffix)
+    tmp_path = sibling.with_name(sibling.name + ".tmp")
+    tmp_path.write_bytes(data)
+    tmp_path.replace(sibling)
+
+
+def compress_file(task: tuple[Path, int, int | None]) -> None:
+    """Writes the .gz and, with a brotli level, .br copies of one file.
+
+    The gzip header carries no timestamp, so unchanged input gives
+    identical output.
+
+    Args:
+        task (tuple[Path, int, int | None]): The file, the gzip level and the
+            brotli quality, or None to skip brotli.
+    """
+    path, gzip_level, brotli_level = task
+    data = path.read_bytes()
+
+    _write_sibling(path, ".gz", gzip.compress(data, compresslevel=gzip_level, mtime=0))
+    if brotli_level is not None:
+        _write_sibling(path, ".br", brotli.compress(data, quality=brotli_level))
+
+
+def remove_siblings(dest_dir_path: Path, rel_paths) -> int:
+    """Deletes the compressed copies of files, returning how many files had any."""
+    removed = 0
+
+    for rel_path in rel_paths:
+        path = dest_dir_path / rel_path
+        found = False
+        for suffix in (".gz", ".br"):
+            sibling = path.with_name(path.name + suffix)
+            if sibling.is_file():
+                sibling.unlink()
+                found = True
+        removed += found
+
+    return removed
+
+
+def precompress(
+    dest_dir_path: Path,
+    previous=None,
+    gzip_level: int = DEFAULT_GZIP_LEVEL,
+    brotli_level: int | None = DEFAULT_BROTLI_LEVEL,
+    jobs: int = 1,
+) -> dict:
+    """Writes .gz and .br siblings of every text file in the output directory.
+
+    They can be served as is, e.g. by nginx with gzip_static and
+    brotli_static. A file is only compressed again when its content hash or
+    the levels differ from the previous run, or a sibling is missing. Files
+    whose size and mtime are unchanged are not read to hash them again.
+    Siblings of files that no longer exist are removed. Compression runs on
+    `jobs` worker processes.
+
+    Args:
+        dest_dir_path (Path): The output directory.
+        previous (dict | None, optional): The previous run's result.
+        gzip_level (int, optional): gzip level, 1-9. Defaults to DEFAULT_GZIP_LEVEL.
+        brotli_level (int | None, optional): brotli quality, 0-11, or None to
+            skip brotli. Ignored when brotli is not installed.
+        jobs (int, optional): Number of worker processes. Defaults to 1.
+
+    Returns:
+        dict: The levels used and the stat_digest of each compressed file,
+            keyed by POSIX path relative to dest_dir_path.
+    """
+    if brotli is None:
+        brotli_level = None
+    previous = previous or {}
+    levels = [gzip_level, brotli_level]
+    previous_digests = previous.get("files", {})
+    previous_files = previous_digests if previous.get("levels") == levels else {}
+    suffixes = sibling_suffixes(brotli_level)
+    files = {}
+    to_compress = []
+
+    for rel_path in sorted(list_files(dest_dir_path)):
+        if Path(rel_path).suffix.lower() not in COMPRESS_SUFFIXES:
+            continue
+        path = dest_dir_path / rel_path
+        files[rel_path] = stat_digest(path, previous_digests.get(rel_path))
+        previous_file = previous_files.get(rel_path)
+        if isinstance(previous_file, list) and previous_file[2] == files[rel_path][2] and all(
+            path.with_name(path.name + suffix).is_file() for suffix in suffixes
+        ):
+            continue
+        to_compress.append((path, gzip_level, brotli_level))
+
+    if jobs > 1 and len(to_compress) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            list(executor.map(compress_file, to_compress, chunksize=max(1, len(to_compress) // (jobs * 4))))
+    else:
+        for task in to_compress:
+            compress_file(task)
+
+    stale = sorted(set(previous.get("files", {})) - set(files))
+    removed = remove_siblings(dest_dir_path, stale)
+    if brotli_level is None and previous.get("levels", [None, None])[1] is not None:
+        # Drop the .br files of a run that had brotli.
+        for rel_path in files:
+            (dest_dir_path / (rel_path + ".br")).unlink(missing_ok=True)
+
+    print(
+        f" * {len(to_compress)} compressed ({', '.join(suffixes)}), "
+        f"{len(files) - len(to_compress)} unchanged, {removed} removed"
+    )
+
+    return {"levels": levels, "files": files}
@@ -0,0 +1,171 @@
+import io
+import json
+import os
+import time
+from pathlib import Path
+
+from build_manifest import hash_bytes
+from generate_content import page_result, page_template
+from html_node import ParentNode, escape_text
+from markdown_blocks import BLOCK_TYPES, block_to_html_node, classify_blocks, markdown_to_blocks
+from page_io import write_atomic
+from page_meta import split_front_matter
+from site_files import PageSummary
+from template import Template
+
+STAGES = ("read", "blocks", "block_type", "inline", "to_html", "template", "write")
+
+
+def profile_page(
+    from_path,
+    template: Template,
+    dest_path,
+    base_path,
+    ast_cache=None,
+    source_hash=None,
+    summarize=False,
+    output_hash=None,
+):
+    """Renders a page like generate_page, but one stage at a time with timings.
+
+    This path is only taken with --profile, so the regular streaming renderer
+    carries no instrumentation. `inline` covers converting typed blocks into
+    nodes, which is dominated by inline parsing; on a parsed-tree cache hit
+    the three parse stages are zero.
+
+    Returns:
+        dict: generate_page's result plus the page's start time and pid, and
+            seconds spent in each stage.
+    """
+    clock = time.perf_counter
+    timings = dict.fromkeys(STAGES, 0.0)
+    start = last = clock()
+
+    def lap(stage):
+        nonlocal last
+        now = clock()
+        if stage is not None:
+            timings[stage] += now - last
+        last = now
+
+    with open(from_path, "r") as from_file:
+        markdown_content = from_file.read()
+    meta, markdown_content = split_front_matter(markdown_content)
+    lap("read")
+
+    if meta.get("draft"):
+        return {**page_result(meta), "start": start, "pid": os.getpid(), "stages": timings}
+    template = page_template(meta, template, base_path)
+    node = None
+    if ast_cache is not None:
+        source_hash = source_hash or hash_bytes(markdown_content.encode())
+        node = ast_cache.get(source_hash)
+        lap("read")
+    if node is None:
+        blocks = markdown_to_blocks(markdown_content)
+        lap("blocks")
+        block_codes = classify_blocks(blocks)
+        lap("block_type")
+        node = ParentNode("div", [block_to_html_node(b, BLOCK_TYPES[c]) for b, c in zip(blocks, block_codes)])
+        lap("inline")
+        if ast_cache is not None:
+            ast_cache.put(source_hash, node)
+            lap(None)
+
+    out = io.StringIO()
+    node.write_html(out, template.rewrite_url, template.image_attrs)
+    html = out.getvalue()
+    lap("to_html")
+    page = template.render(Title=escape_text(meta["title"]), Content=html)
+    lap("template")
+    _, output_hash = write_atomic(dest_path, lambda dest_file: dest_file.write(page), output_hash)
+    lap("write")
+    summary = PageSummary.from_blocks(node.children) if summarize else None
+
+    return {**page_result(meta, summary, template, output_hash), "start": start, "pid": os.getpid(), "stages": timings}
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Returns the nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+
+    return sorted_values[index]
+
+
+class Profiler:
+    """Collects per-page stage timings and reports on them.
+
+    Attributes:
+        pages (list[tuple[Path, dict]]): Source path and profile_page result for each page.
+    """
+
+    def __init__(self) -> None:
+        self.pages = []
+
+    def add(self, from_path: Path, result: dict) -> None:
+        self.pages.append((from_path, result))
+
+    def report(self, top: int = 10) -> str:
+        """Formats stage totals, page-time percentiles and the slowest pages.
+
+        Args:
+            top (int, optional): Number of slowest pages to list. Defaults to 10.
+
+        Returns:
+            str: The report.
+        """
+        if not self.pages:
+            return "No pages were rendered."
+        totals = dict.fromkeys(STAGES, 0.0)
+        page_times = []
+
+        for from_path, result in self.pages:
+            for stage, seconds in result["stages"].items():
+                totals[stage] += seconds
+            page_times.append((sum(result["stages"].values()), from_path))
+
+        overall = sum(totals.values())
+        lines = [f"Profiled {len(self.pages)} pages, {overall * 1000:.1f} ms total", "", "Stage totals:"]
+        for stage, seconds in totals.items():
+            share = seconds / overall if overall else 0.0
+            lines.append(f"  {stage:<11} {seconds * 1000:10.1f} ms  {share:6.1%}")
+
+        sorted_times = sorted(seconds for seconds, _ in page_times)
+        lines += ["", "Page time percentiles:"]
+        for label, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0)):
+            lines.append(f"  {label:<4} {percentile(sorted_times, fraction) * 1000:10.2f} ms")
+
+        lines += ["", f"Slowest {min(top, len(page_times))} pages:"]
+        for seconds, from_path in sorted(page_times, key=lambda item: item[0], reverse=True)[:top]:
+            lines.append(f"  {seconds * 1000:10.2f} ms  {from_path}")
+
+        return "\n".join(lines)
+
+    def write_trace(self, path: Path) -> None:
+        """Writes the timings as Chrome trace-event JSON (chrome://tracing, Perfetto).
+
+        Each page is a complete event on its worker's track with one nested
+        event per stage.
+
+        Args:
+            path (Path): Where to write the trace.
+        """
+        events = []
+
+        for from_path, result in self.pages:
+            ts = result["start"] * 1e6
+            duration = sum(result["stages"].values()) * 1e6
+            events.append(
+                {"name": str(from_path), "cat": "page", "ph": "X", "ts": ts, "dur": duration,
+                 "pid": 0, "tid": result["pid"]}
+            )
+            for stage, seconds in result["stages"].items():
+                events.append(
+                    {"name": stage, "cat": "stage", "ph": "X", "ts": ts, "dur": seconds * 1e6,
+                     "pid": 0, "tid": result["pid"]}
+                )
+                ts += seconds * 1e6
+
+        path.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}))
@@ -0,0 +1,232 @@
+import os
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from build_manifest import hash_file
+from copy_static import copy_file
+from generate_content import (
+    PageGenerationError,
+    PageTask,
+    RenderContext,
+    generate_page,
+    render_and_record,
+    reset_page_templates,
+)
+from images import IMAGE_SUFFIXES
+from main import (
+    build,
+    build_parser,
+    compress_outputs,
+    dir_path_content,
+    dir_path_public,
+    dir_path_static,
+    make_ast_cache,
+    template_path,
+    wants_images,
+    wants_site_files,
+    write_site_outputs,
+)
+from site_index import DEFAULT_INCLUDE, matches
+from template import Template
+
+watched_paths = (dir_path_content, dir_path_static, template_path)
+
+
+def snapshot(paths) -> dict[Path, tuple[int, int]]:
+    """Records the mtime and size of every file under the given paths.
+
+    Args:
+        paths: Files or directories to scan.
+
+    Returns:
+        dict[Path, tuple[int, int]]: (mtime_ns, size) keyed by file path.
+    """
+    files = {}
+
+    for root in paths:
+        if root.is_file():
+            stat = root.stat()
+            files[root] = (stat.st_mtime_ns, stat.st_size)
+            continue
+        for dirpath, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = Path(dirpath) / filename
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                files[path] = (stat.st_mtime_ns, stat.st_size)
+
+    return files
+
+
+def wait_for_changes(previous, interval: float, debounce: float):
+    """Polls until the watched files change, then waits for them to settle.
+
+    A burst of saves only ends the wait once no file has changed for
+    `debounce` seconds, so it triggers a single rebuild.
+
+    Args:
+        previous (dict): The last snapshot.
+        interval (float): Seconds between polls.
+        debounce (float): Seconds the tree must stay unchanged.
+
+    Returns:
+        tuple[dict, set[Path], set[Path]]: The new snapshot, changed or added
+            files, and deleted files.
+    """
+    current = previous
+
+    while current == previous:
+        time.sleep(interval)
+        current = snapshot(watched_paths)
+
+    while True:
+        time.sleep(debounce)
+        latest = snapshot(watched_paths)
+        if latest == current:
+            break
+        current = latest
+
+    changed = {path for path, stat in current.items() if previous.get(path) != stat}
+    deleted = set(previous) - set(current)
+
+    return current, changed, deleted
+
+
+def output_path(path: Path) -> Path:
+    """Maps a watched source file to the file it produces in public/.
+
+    Args:
+        path (Path): A file under content/ or static/.
+
+    Returns:
+        Path: The corresponding output path.
+    """
+    if path.is_relative_to(dir_path_content):
+        return (dir_path_public / path.relative_to(dir_path_content)).with_suffix(".html")
+
+    return dir_path_public / path.relative_to(dir_path_static)
+
+
+def is_static(path: Path) -> bool:
+    return path.is_relative_to(dir_path_static)
+
+
+def is_page_source(path: Path, include, exclude) -> bool:
+    if not path.is_relative_to(dir_path_content):
+        return False
+    rel_path = path.relative_to(dir_path_content).as_posix()
+
+    return matches(rel_path, include) and not matches(rel_path, exclude)
+
+
+def rebuild(args, manifest, changed, deleted):
+    """Updates public/ for a set of changed and deleted source files.
+
+    Template changes, static changes when assets are fingerprinted and image
+    changes when images are processed fall back to a full build; otherwise only the touched pages are rendered and
+    only the touched static files are copied.
+
+    Args:
+        args: Parsed command-line arguments.
+        manifest (BuildManifest): Manifest of the current build, updated in place.
+        changed (set[Path]): Files that were added or modified.
+        deleted (set[Path]): Files that were removed.
+
+    Returns:
+        BuildManifest: The manifest describing public/ after the rebuild.
+    """
+    if template_path in changed:
+        print("Template changed, rebuilding everything...")
+        return build(args)
+    if args.fingerprint and any(is_static(path) for path in changed | deleted):
+        print("Fingerprinted assets changed, rebuilding everything...")
+        return build(args)
+    images_changed = any(is_static(path) and path.suffix.lower() in IMAGE_SUFFIXES for path in changed | deleted)
+    if wants_images(args) and images_changed:
+        print("Images changed, rebuilding everything...")
+        return build(args)
+
+    reset_page_templates()
+    template = Template.from_file(template_path, args.base_path, manifest.assets, manifest.images, args.minify)
+    context = RenderContext(generate_page, template, args.base_path, make_ast_cache(args), wants_site_files(args))
+    include = args.include or DEFAULT_INCLUDE
+    changed = {path for path in changed if is_page_source(path, include, args.exclude) or is_static(path)}
+    deleted = {path for path in deleted if is_page_source(path, include, args.exclude) or is_static(path)}
+
+    for path in sorted(deleted):
+        output = output_path(path)
+        print(f" - removed {output}")
+        output.unlink(missing_ok=True)
+        if path.is_relative_to(dir_path_content):
+            manifest.forget(path)
+        else:
+            manifest.static_files.pop(path.relative_to(dir_path_static).as_posix(), None)
+
+    for path in sorted(changed):
+        output = output_path(path)
+
+        if is_static(path):
+            print(f" * {path} -> {output}")
+            copy_file(path, output, link=args.link_static)
+            rel_path = path.relative_to(dir_path_static).as_posix()
+            manifest.static_files[rel_path] = rel_path
+            continue
+        stat = path.stat()
+        output_hash = manifest.output_hash(path, output)
+        task = PageTask(path, output, hash_file(path), stat.st_size, stat.st_mtime_ns, output_hash)
+        try:
+            render_and_record(task, context, manifest, template_path)
+        except PageGenerationError as e:
+            print(f"error: {e}")
+
+    write_site_outputs(args, manifest)
+    compress_outputs(args, manifest)
+    manifest.save()
+
+    return manifest
+
+
+def start_server(port: int) -> ThreadingHTTPServer:
+    handler = partial(SimpleHTTPRequestHandler, directory=str(dir_path_public))
+    server = ThreadingHTTPServer(("", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Serving {dir_path_public} at http://localhost:{port}/")
+
+    return server
+
+
+def main(argv=None):
+    parser = build_parser()
+    parser.description = "Build the site and serve public/ over HTTP."
+    parser.add_argument("--port", type=int, default=8888,
+                        help="port to serve on (default: %(default)s)")
+    parser.add_argument("--watch", action="store_true",
+                        help="rebuild touched pages and assets when sources change")
+    parser.add_argument("--interval", type=float, default=0.5,
+                        help="seconds between polls in watch mode (default: %(default)s)")
+    parser.add_argument("--debounce", type=float, default=0.2,
+                        help="seconds sources must stay unchanged before rebuilding (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    manifest = build(args)
+    server = start_server(args.port)
+
+    try:
+        if not args.watch:
+            threading.Event().wait()
+        previous = snapshot(watched_paths)
+        while True:
+            previous, changed, deleted = wait_for_changes(previous, args.interval, args.debounce)
+            manifest = rebuild(args, manifest, changed, deleted)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+import html
+import json
+import re
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from page_io import write_atomic
+
+EXCERPT_LENGTH = 200
+FEED_LIMIT = 20
+SITEMAP_NAME = "sitemap.xml"
+FEED_NAME = "feed.xml"
+SEARCH_INDEX_NAME = "search-index.json"
+TAG_PATTERN = re.compile(r"<[^>]*>")
+TOKEN_PATTERN = re.compile(r"\w\w+")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def node_text(node) -> str:
+    """Returns the visible text of a node tree.
+
+    Raw leaves hold HTML (e.g. fragments from the inline cache), so their
+    tags are dropped and entities decoded.
+
+    Args:
+        node (HTMLNode): The root of the tree.
+
+    Returns:
+        str: The text. Inline leaves are joined as they are, nested elements
+            such as list items with a space.
+    """
+    if node.children is None:
+        value = node.value or ""
+        if node.raw:
+            value = html.unescape(TAG_PATTERN.sub("", value))
+        return value
+
+    return "".join(
+        [node_text(child) if child.children is None else f" {node_text(child)} " for child in node.children]
+    )
+
+
+class PageSummary:
+    """Collects the text of a page's blocks while the page is rendered.
+
+    Pass add() each block node as it is written; the excerpt is taken from
+    the leading paragraphs and the tokens from every block.
+    """
+
+    def __init__(self, excerpt_length: int = EXCERPT_LENGTH) -> None:
+        self.excerpt_length = excerpt_length
+        self._paragraphs = []
+        self._excerpt_size = 0
+        self._tokens = set()
+
+    @classmethod
+    def from_blocks(cls, nodes) -> "PageSummary":
+        """Summarizes an already parsed page.
+
+        Args:
+            nodes (Iterable[ParentNode]): The page's block nodes, e.g. the root <div>'s children.
+
+        Returns:
+            PageSummary: The summary.
+        """
+        summary = cls()
+        for node in nodes:
+            summary.add(node)
+
+        return summary
+
+    def add(self, node) -> None:
+        """Adds one block node of the page.
+
+        Args:
+            node (ParentNode): A block-level node, e.g. a <p> or <ul>.
+        """
+        text = node_text(node)
+        self._tokens.update(TOKEN_PATTERN.findall(text.lower()))
+
+        if node.tag == "p" and self._excerpt_size < self.excerpt_length:
+            self._paragraphs.append(text)
+            self._excerpt_size += len(text) + 1
+
+    def excerpt(self) -> str:
+        """Returns the start of the page's paragraph text, cut at a word boundary."""
+        text = WHITESPACE_PATTERN.sub(" ", " ".join(self._paragraphs)).strip()
+
+        if len(text) <= self.excerpt_length:
+            return text
+        cut = text.rfind(" ", 0, self.excerpt_length)
+
+        return text[: cut if cut > 0 else self.excerpt_length] + "…"
+
+    def to_dict(self, meta: dict) -> dict:
+        """Returns the summary stored in the build manifest.
+
+        Args:
+            meta (dict): The page's front matter, including its title.
+
+        Returns:
+            dict: The title, excerpt, sorted unique tokens and, if set, the date.
+        """
+        tokens = self._tokens | set(TOKEN_PATTERN.findall(meta["title"].lower()))
+        summary = {"title": meta["title"], "excerpt": self.excerpt(), "tokens": sorted(tokens)}
+
+        if "date" in meta:
+            summary["date"] = str(meta["date"])
+
+        return summary
+
+
+def page_url(output: Path, dir_path_public: Path, base_path: str) -> str:
+    """Returns the URL a generated page is served at, e.g. "/blog/tom/".
+
+    Args:
+        output (Path): The HTML file.
+        dir_path_public (Path): The output directory.
+        base_path (str): URL prefix the site is served under.
+
+    Returns:
+        str: The page's URL, without the trailing index.html.
+    """
+    rel_path = output.relative_to(dir_path_public).as_posix()
+
+    if rel_path == "index.html" or rel_path.endswith("/index.html"):
+        rel_path = rel_path[: -len("index.html")]
+
+    return base_path + rel_path
+
+
+def parse_date(value: str) -> datetime | None:
+    """Parses an ISO 8601 front matter date, treating naive values as UTC."""
+    try:
+        date = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+    return date if date.tzinfo is not None else date.replace(tzinfo=timezone.utc)
+
+
+def collect_pages(manifest_pages: dict, dir_path_public: Path, base_path: str) -> list[dict]:
+    """Lists every page that has a summary, with its URL, sorted by URL.
+
+    Args:
+        manifest_pages (dict[str, dict]): BuildManifest.pages.
+        dir_path_public (Path): The output directory.
+        base_path (str): URL prefix the site is served under.
+
+    Returns:
+        list[dict]: Each page's summary plus a "url" key.
+    """
+    pages = [
+        {**entry["summary"], "url": page_url(Path(entry["output"]), dir_path_public, base_path)}
+        for entry in manifest_pages.values()
+        if "summary" in entry
+    ]
+    pages.sort(key=lambda page: page["url"])
+
+    return pages
+
+
+def write_sitemap(pages: list[dict], path: Path, site_url: str) -> None:
+    """Writes a sitemaps.org sitemap listing every page.
+
+    Args:
+        pages (list[dict]): Pages from collect_pages.
+        path (Path): Where to write the sitemap.
+        site_url (str): Scheme and host the site is served from, e.g. "https://example.com".
+    """
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+    ]
+
+    for page in pages:
+        date = parse_date(page["date"]) if "date" in page else None
+        lastmod = f"<lastmod>{date.date().isoformat()}</lastmod>" if date is not None else ""
+        lines.append(f"  <url><loc>{escape(site_url + page['url'])}</loc>{lastmod}</url>")
+    lines.append("</urlset>")
+
+    write_atomic(path, lambda out: out.write("\n".join(lines) + "\n"))
+
+
+def write_feed(pages: list[dict], path: Path, site_url: str, base_path: str, limit: int = FEED_LIMIT) -> None:
+    """Writes an RSS 2.0 feed of the most recent pages.
+
+    Pages are ordered by their front matter date, newest first; undated
+    pages follow the dated ones.
+
+    Args:
+        pages (list[dict]): Pages from collect_pages.
+        path (Path): Where to write the feed.
+        site_url (str): Scheme and host the site is served from.
+        base_path (str): URL prefix the site is served under.
+        limit (int, optional): Maximum number of items. Defaults to FEED_LIMIT.
+    """
+    home = next((page for page in pages if page["url"] == base_path), None)
+    link = site_url + base_path
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<rss version="2.0">',
+        "<channel>",
+        f"  <title>{escape(home['title'] if home else site_url)}</title>",
+        f"  <link>{escape(link)}</link>",
+        f"  <description>{escape(home['excerpt'] if home else link)}</description>",
+    ]
+    dated = sorted(pages, key=lambda page: page.get("date", ""), reverse=True)
+
+    for page in dated[:limit]:
+        url = escape(site_url + page["url"])
+        date = parse_date(page["date"]) if "date" in page else None
+        lines += [
+            "  <item>",
+            f"    <title>{escape(page['title'])}</title>",
+            f"    <link>{url}</link>",
+            f"    <guid>{url}</guid>",
+            f"    <description>{escape(page['excerpt'])}</description>",
+        ]
+        if date is not None:
+            lines.append(f"    <pubDate>{format_datetime(date)}</pubDate>")
+        lines.append("  </item>")
+    lines += ["</channel>", "</rss>"]
+
+    write_atomic(path, lambda out: out.write("\n".join(lines) + "\n"))
+
+
+def write_search_index(pages: list[dict], path: Path) -> None:
+    """Writes a prebuilt inverted index for client-side search.
+
+    The JSON holds `pages`, a list of `[url, title, excerpt]`, and `tokens`,
+    mapping each lowercase word to the indexes of the pages containing it.
+
+    Args:
+        pages (list[dict]): Pages from collect_pages.
+        path (Path): Where to write the index.
+    """
+    tokens = {}
+
+    for page_id, page in enumerate(pages):
+        for token in page["tokens"]:
+            tokens.setdefault(token, []).append(page_id)
+    data = {
+        "pages": [[page["url"], page["title"], page["excerpt"]] for page in pages],
+        "tokens": dict(sorted(tokens.items())),
+    }
+
+    write_atomic(path, lambda out: out.write(json.dumps(data, ensure_ascii=False, separators=(",", ":"))))
+
+
+def write_site_files(
+    manifest_pages: dict, dir_path_public: Path, base_path: str, site_url: str | None = None, search_index=False
+) -> list[Path]:
+    """Writes the sitemap, feed and search index from the pages' recorded summaries.
+
+    Nothing is re-read from the generated HTML.
+
+    Args:
+        manifest_pages (dict[str, dict]): BuildManifest.pages.
+        dir_path_public (Path): The output directory.
+        base_path (str): URL prefix the site is served under.
+        site_url (str | None, optional): Enables the sitemap and feed, which need absolute URLs.
+        search_index (bool, optional): Whether to write the search index. Defaults to False.
+
+    Returns:
+        list[Path]: The files that were written.
+    """
+    pages = collect_pages(manifest_pages, dir_path_public, base_path)
+    written = []
+
+    if site_url:
+        site_url = site_url.rstrip("/")
+        write_sitemap(pages, dir_path_public / SITEMAP_NAME, site_url)
+        write_feed(pages, dir_path_public / FEED_NAME, site_url, base_path)
+        written += [dir_path_public / SITEMAP_NAME, dir_path_public / FEED_NAME]
+    if search_index:
+        write_search_index(pages, dir_path_public / SEARCH_INDEX_NAME)
+        written.append(dir_path_public / SEARCH_INDEX_NAME)
+
+    return written
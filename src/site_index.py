@@ -0,0 +1,88 @@
+import os
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import NamedTuple
+
+DEFAULT_INCLUDE = ("*.md",)
+
+
+class Page(NamedTuple):
+    """A markdown source found in the content tree.
+
+    Attributes:
+        source (Path): The markdown file.
+        dest (Path): The HTML file it renders to.
+        rel_path (str): POSIX path of the source relative to the content directory.
+        size (int): Source size in bytes.
+        mtime_ns (int): Source modification time in nanoseconds.
+    """
+
+    source: Path
+    dest: Path
+    rel_path: str
+    size: int
+    mtime_ns: int
+
+
+def matches(rel_path: str, patterns) -> bool:
+    """Checks a relative path against glob patterns.
+
+    A pattern matches either the whole relative path or, if it has no slash,
+    the file name alone, so "*.md" and "drafts/*" both work as expected.
+
+    Args:
+        rel_path (str): POSIX path relative to the content directory.
+        patterns (Iterable[str]): Glob patterns.
+
+    Returns:
+        bool: True if any pattern matches.
+    """
+    name = rel_path.rsplit("/", 1)[-1]
+
+    return any(fnmatch(rel_path, pattern) or ("/" not in pattern and fnmatch(name, pattern)) for pattern in patterns)
+
+
+def build_site_index(
+    dir_path_content: Path, dest_dir_path: Path, include=DEFAULT_INCLUDE, exclude=()
+) -> list[Page]:
+    """Walks the content tree once and lists every page to render.
+
+    Uses os.scandir so file types and stat results come from the directory
+    listing instead of separate syscalls per file.
+
+    Args:
+        dir_path_content (Path): The content directory.
+        dest_dir_path (Path): The output directory.
+        include (Iterable[str], optional): Globs a source must match. Defaults to ("*.md",).
+        exclude (Iterable[str], optional): Globs that drop a source. Defaults to ().
+
+    Returns:
+        list[Page]: Pages sorted by relative path.
+    """
+    pages = []
+    pending = [(dir_path_content, "")]
+
+    while pending:
+        dir_path, prefix = pending.pop()
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                rel_path = prefix + entry.name
+                if entry.is_dir():
+                    pending.append((Path(entry.path), rel_path + "/"))
+                    continue
+                if not entry.is_file() or not matches(rel_path, include) or matches(rel_path, exclude):
+                    continue
+                stat = entry.stat()
+                pages.append(
+                    Page(
+                        Path(entry.path),
+                        (dest_dir_path / rel_path).with_suffix(".html"),
+                        rel_path,
+                        stat.st_size,
+                        stat.st_mtime_ns,
+                    )
+                )
+
+    pages.sort(key=lambda page: page.rel_path.split("/"))
+
+    return pages
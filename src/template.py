@@ -0,0 +1,262 @@
+import json
+import re
+from functools import partial
+from pathlib import Path
+from build_manifest import hash_bytes
+from images import image_attribute_writer
+
+SLOT_PATTERN = re.compile(r"\{\{ (\w+) \}\}")
+URL_ATTRIBUTE_PATTERN = re.compile(r'\b(href|src)="([^"]*)"')
+# Elements whose content is whitespace-sensitive and copied as is.
+PRESERVED_PATTERN = re.compile(r"<(pre|textarea|script|style)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+# Conditional comments are kept, since old browsers act on them.
+COMMENT_PATTERN = re.compile(r"<!--(?!\[if).*?-->", re.DOTALL)
+WHITESPACE_PATTERN = re.compile(r"\s+")
+# Whitespace next to these tags is not rendered, so it can go entirely.
+BLOCK_TAG_PATTERN = re.compile(
+    r" ?(<!doctype[^>]*>|</?(?:html|head|body|meta|link|title|base|div|p|ul|ol|li|dl|dt|dd|header|footer|main"
+    r"|article|section|nav|aside|h[1-6]|table|thead|tbody|tfoot|tr|th|td|form|fieldset|hr|br|figure|figcaption"
+    r"|blockquote|noscript)\b[^>]*>) ?",
+    re.IGNORECASE,
+)
+
+
+def minify_text(html: str) -> str:
+    """Drops comments and collapses whitespace in HTML without preserved elements."""
+    html = WHITESPACE_PATTERN.sub(" ", COMMENT_PATTERN.sub("", html))
+
+    return BLOCK_TAG_PATTERN.sub(r"\1", html)
+
+
+def minify_html(html: str) -> str:
+    """Removes comments and whitespace that do not affect how a page renders.
+
+    Runs of whitespace become a single space, which is dropped entirely
+    next to block-level tags. The contents of <pre>, <textarea>, <script>
+    and <style> are left untouched.
+
+    Args:
+        html (str): The HTML, e.g. a template with `{{ Name }}` slots.
+
+    Returns:
+        str: The minified HTML.
+    """
+    pieces = []
+    pos = 0
+    block_before = False
+
+    for match in PRESERVED_PATTERN.finditer(html):
+        block = match[1].lower() != "textarea"
+        text = minify_text(html[pos : match.start()])
+        pieces += [text.lstrip() if block_before else text, match[0]]
+        if block:
+            pieces[-2] = pieces[-2].rstrip()
+        block_before = block
+        pos = match.end()
+    text = minify_text(html[pos:])
+    pieces.append(text.lstrip() if block_before else text)
+
+    return "".join(pieces).strip()
+
+
+def rewrite_urls(html: str, rewrite_url) -> str:
+    """Applies a URL rewriter to every href and src attribute in an HTML string.
+
+    Args:
+        html (str): HTML to rewrite.
+        rewrite_url (Callable[[str], str] | None): The rewriter; None leaves the HTML as is.
+
+    Returns:
+        str: The rewritten HTML.
+    """
+    if rewrite_url is None:
+        return html
+
+    return URL_ATTRIBUTE_PATTERN.sub(lambda match: f'{match[1]}="{rewrite_url(match[2])}"', html)
+
+
+def rewrite_base_path(html: str, base_path: str) -> str:
+    """Points root-relative href and src attributes at the site's base path.
+
+    Args:
+        html (str): HTML to rewrite.
+        base_path (str): URL prefix the site is served under.
+
+    Returns:
+        str: The rewritten HTML.
+    """
+    return rewrite_urls(html, base_path_rewriter(base_path))
+
+
+def prefix_root_url(base_path: str, url: str) -> str:
+    """Moves a root-relative URL under the base path and leaves others unchanged."""
+    if url.startswith("/"):
+        return base_path + url[1:]
+
+    return url
+
+
+def rewrite_site_url(base_path: str, assets: dict[str, str], url: str) -> str:
+    """Points a root-relative URL at its fingerprinted asset, then under the base path."""
+    if url.startswith("/"):
+        return base_path + assets.get(url, url)[1:]
+
+    return url
+
+
+def base_path_rewriter(base_path: str, assets: dict[str, str] | None = None):
+    """Returns a URL rewriter that moves root-relative URLs under the base path.
+
+    The rewriter is passed to write_html, which applies it to href and src
+    attributes only, so text and code that merely contain `href="/` are left
+    alone.
+
+    Args:
+        base_path (str): URL prefix the site is served under.
+        assets (dict[str, str] | None, optional): Fingerprinted URLs of static
+            assets keyed by their plain URL, e.g. "/index.css" -> "/index.1a2b3c4d5e.css".
+
+    Returns:
+        Callable[[str], str] | None: The rewriter, or None when there is nothing to rewrite.
+    """
+    if assets:
+        return partial(rewrite_site_url, base_path, assets)
+    if base_path == "/":
+        return None
+
+    return partial(prefix_root_url, base_path)
+
+
+def assets_digest(assets: dict[str, str]) -> str:
+    """Returns a short digest identifying a fingerprinted-asset mapping."""
+    return hash_bytes(json.dumps(assets, sort_keys=True).encode())[:16]
+
+
+class Template:
+    """A page template compiled into static segments and named slots.
+
+    The template is split once on its `{{ Name }}` placeholders, and URL
+    rewriting (and, if enabled, minification) is applied to the static
+    segments at compile time, so rendering a page is a single join.
+    Placeholders that are given no value are left in the page as written,
+    so templates can carry `{{ }}` syntax meant for something else, such as
+    a client-side templating snippet.
+
+    Attributes:
+        slots (list[tuple[int, str]]): Index into the segment list and name of each slot.
+        assets (dict[str, str]): Fingerprinted asset URLs keyed by their plain URL.
+        assets_key (str): Digest of `assets`, for caching templates compiled with them.
+        images (dict[str, dict] | None): Sizes and variants of static images, or
+            None when <img> tags are left as they are.
+        images_key (str | None): Digest of `images`.
+        rewrite_url (Callable[[str], str] | None): URL rewriter for the base path
+            and assets, for serializing page content with write_html.
+        image_attrs (Callable[[str], str] | None): Image hook for write_html,
+            adding size and lazy-loading attributes to <img> tags.
+        minify (bool): Whether the template was minified.
+        bytes_saved (int): UTF-8 bytes minification removed from every page.
+    """
+
+    def __init__(
+        self,
+        text: str,
+        base_path: str = "/",
+        assets: dict[str, str] | None = None,
+        images: dict[str, dict] | None = None,
+        minify: bool = False,
+    ) -> None:
+        """Compiles template text.
+
+        Args:
+            text (str): The template source.
+            base_path (str, optional): URL prefix the site is served under. Defaults to "/".
+            assets (dict[str, str] | None, optional): Fingerprinted asset URLs keyed by their plain URL.
+            images (dict[str, dict] | None, optional): The collect_images result.
+            minify (bool, optional): Minify the template with minify_html. Defaults to False.
+        """
+        self.minify = minify
+        self.bytes_saved = 0
+        if minify:
+            minified = minify_html(text)
+            self.bytes_saved = len(text.encode()) - len(minified.encode())
+            text = minified
+        parts = SLOT_PATTERN.split(text)
+        self.assets = dict(assets or {})
+        self.assets_key = assets_digest(self.assets)
+        self.images = images
+        self.images_key = assets_digest(images) if images is not None else None
+        self.rewrite_url = base_path_rewriter(base_path, self.assets)
+        self.image_attrs = image_attribute_writer(images, self.rewrite_url)
+        self._segments = []
+        self.slots = []
+
+        for i, part in enumerate(parts):
+            if i % 2 == 0:
+                self._segments.append(rewrite_urls(part, self.rewrite_url))
+            else:
+                self.slots.append((i, part))
+                self._segments.append("{{ " + part + " }}")
+
+    @classmethod
+    def from_file(
+        cls,
+        path: Path,
+        base_path: str = "/",
+        assets: dict[str, str] | None = None,
+        images: dict[str, dict] | None = None,
+        minify: bool = False,
+    ) -> "Template":
+        """Reads and compiles a template file.
+
+        Args:
+            path (Path): Path to the template.
+            base_path (str, optional): URL prefix the site is served under. Defaults to "/".
+            assets (dict[str, str] | None, optional): Fingerprinted asset URLs keyed by their plain URL.
+            images (dict[str, dict] | None, optional): The collect_images result.
+            minify (bool, optional): Minify the template. Defaults to False.
+
+        Returns:
+            Template: The compiled template.
+        """
+        with open(path, "r") as template_file:
+            return cls(template_file.read(), base_path, assets, images, minify)
+
+    def write(self, out, **values) -> None:
+        """Writes the page to a text stream, slot by slot.
+
+        Args:
+            out: Any object with a `write(str)` method.
+            **values: Slot values keyed by slot name. A value is either a string
+                or a callable that writes the slot's content to the stream it is given.
+        """
+        slot_names = dict(self.slots)
+
+        for index, segment in enumerate(self._segments):
+            name = slot_names.get(index)
+
+            if name not in values:
+                out.write(segment)
+                continue
+            value = values[name]
+
+            if callable(value):
+                value(out)
+            else:
+                out.write(value)
+
+    def render(self, **values: str) -> str:
+        """Fills every slot and returns the page.
+
+        Args:
+            **values (str): Slot values keyed by slot name, e.g. Title and Content.
+
+        Returns:
+            str: The rendered page.
+        """
+        pieces = self._segments.copy()
+
+        for index, name in self.slots:
+            if name in values:
+                pieces[index] = values[name]
+
+        return "".join(pieces)
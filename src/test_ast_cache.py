@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from ast_cache import AstCache, data_to_node, node_to_data
+from markdown_blocks import markdown_to_html_node, set_inline_cache_size
+
+
+class TestAstCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        node = markdown_to_html_node(
+            "# title\n\n- a [link](/x)\n- ![img](/i.png)\n\n```\ncode\n```"
+        )
+        self.assertEqual(data_to_node(node_to_data(node)).to_html(), node.to_html())
+
+    def test_put_shared_inline_nodes(self):
+        set_inline_cache_size(4)
+        self.addCleanup(set_inline_cache_size, 0)
+        cache = AstCache(self.cache_dir)
+        node = markdown_to_html_node("a [link](/x) **b**")
+        cache.put("abc", node)
+        self.assertEqual(cache.get("abc").to_html(), node.to_html())
+
+    def test_get_put(self):
+        cache = AstCache(self.cache_dir)
+        node = markdown_to_html_node("some **text**")
+        self.assertIsNone(cache.get("abc"))
+        cache.put("abc", node)
+        self.assertEqual(cache.get("abc").to_html(), node.to_html())
+
+    def test_trim_evicts_least_recently_used(self):
+        cache = AstCache(self.cache_dir)
+        node = markdown_to_html_node("some **text**")
+        for i, key in enumerate(["old", "used", "new"]):
+            cache.put(key, node)
+            os.utime(cache._entry_path(key), (i, i))
+        cache.get("old")
+        size = cache._entry_path("old").stat().st_size
+        cache.max_bytes = size * 2
+
+        self.assertEqual(cache.trim(), 1)
+        self.assertIsNone(cache.get("used"))
+        self.assertIsNotNone(cache.get("old"))
+        self.assertIsNotNone(cache.get("new"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from build_manifest import BuildManifest, hash_bytes, hash_file, stat_digest
+
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.manifest_path = self.root / "manifest.json"
+        self.source = self.root / "index.md"
+        self.dest = self.root / "index.html"
+        self.dest.write_text("<p>hi</p>")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, template_hash="t1", base_path="/", pages=None):
+        manifest = BuildManifest(self.manifest_path, template_hash, base_path)
+        for source, dest, source_hash in pages or []:
+            manifest.record(source, dest, source_hash)
+        manifest.save()
+        return manifest
+
+    def test_fresh_when_unchanged(self):
+        self.build(pages=[(self.source, self.dest, hash_bytes(b"a"))])
+        manifest = BuildManifest(self.manifest_path, "t1", "/")
+        self.assertTrue(manifest.is_fresh(self.source, self.dest, hash_bytes(b"a")))
+
+    def test_stale_when_source_changes(self):
+        self.build(pages=[(self.source, self.dest, hash_bytes(b"a"))])
+        manifest = BuildManifest(self.manifest_path, "t1", "/")
+        self.assertFalse(manifest.is_fresh(self.source, self.dest, hash_bytes(b"b")))
+
+    def test_stale_when_template_or_base_path_changes(self):
+        self.build(pages=[(self.source, self.dest, hash_bytes(b"a"))])
+        manifest = BuildManifest(self.manifest_path, "t2", "/")
+        self.assertFalse(manifest.is_fresh(self.source, self.dest, hash_bytes(b"a")))
+        manifest = BuildManifest(self.manifest_path, "t1", "/blog/")
+        self.assertFalse(manifest.is_fresh(self.source, self.dest, hash_bytes(b"a")))
+
+    def test_stale_when_output_missing(self):
+        self.build(pages=[(self.source, self.dest, hash_bytes(b"a"))])
+        self.dest.unlink()
+        manifest = BuildManifest(self.manifest_path, "t1", "/")
+        self.assertFalse(manifest.is_fresh(self.source, self.dest, hash_bytes(b"a")))
+
+    def test_stat_digest_reuses_unchanged(self):
+        size, mtime_ns, digest = stat_digest(self.dest)
+        self.assertEqual(digest, hash_file(self.dest))
+        self.assertEqual(stat_digest(self.dest, [size, mtime_ns, "known"]), [size, mtime_ns, "known"])
+        self.assertEqual(stat_digest(self.dest, [size, mtime_ns, "known"], checksum=True)[2], digest)
+        self.assertEqual(stat_digest(self.dest, [size, mtime_ns - 1, "known"])[2], digest)
+        self.assertEqual(stat_digest(self.dest, "an older format")[2], digest)
+
+    def test_known_hash(self):
+        manifest = BuildManifest(self.manifest_path, "t1", "/")
+        manifest.record(self.source, self.dest, "h", 10, 20)
+        manifest.save()
+        manifest = BuildManifest(self.manifest_path, "t2", "/")
+        self.assertEqual(manifest.known_hash(self.source, 10, 20), "h")
+        self.assertIsNone(manifest.known_hash(self.source, 10, 21))
+
+    def test_stale_when_page_template_changes(self):
+        template = self.root / "alt.html"
+        template.write_text("a")
+        manifest = BuildManifest(self.manifest_path, "t1", "/")
+        manifest.record(self.source, self.dest, "h")
+        manifest.record_template(self.source, template)
+        manifest.save()
+        self.assertTrue(BuildManifest(self.manifest_path, "t1", "/").is_fresh(self.source, self.dest, "h"))
+        template.write_text("b")
+        self.assertFalse(BuildManifest(self.manifest_path, "t1", "/").is_fresh(self.source, self.dest, "h"))
+
+    def test_carry_over_keeps_template_and_summary(self):
+        template = self.root / "alt.html"
+        template.write_text("a")
+        manifest = BuildManifest(self.manifest_path, "t1", "/")
+        manifest.record(self.source, self.dest, "h")
+        manifest.record_template(self.source, template)
+        manifest.record_summary(self.source, {"title": "t", "excerpt": "", "tokens": []})
+        manifest.save()
+        manifest = BuildManifest(self.manifest_path, "t1", "/")
+        self.assertTrue(manifest.has_summary(self.source))
+        manifest.record(self.source, self.dest, "h")
+        manifest.carry_over(self.source)
+        manifest.save()
+        template.write_text("b")
+        manifest = BuildManifest(self.manifest_path, "t1", "/")
+        self.assertEqual(manifest.previous_pages[str(self.source)]["summary"]["title"], "t")
+        self.assertFalse(manifest.is_fresh(self.source, self.dest, "h"))
+
+    def test_output_hash(self):
+        manifest = BuildManifest(self.manifest_path, "t1", "/")
+        manifest.record(self.source, self.dest, "h")
+        manifest.record_output_hash(self.source, "o")
+        manifest.save()
+        manifest = BuildManifest(self.manifest_path, "t2", "/")
+        self.assertEqual(manifest.output_hash(self.source, self.dest), "o")
+        self.assertIsNone(manifest.output_hash(self.source, self.root / "other.html"))
+        self.assertIsNone(manifest.output_hash(self.root / "new.md", self.dest))
+        manifest.record(self.source, self.dest, "h")
+        self.assertEqual(manifest.output_hash(self.source, self.dest), "o")
+        manifest.record_output_hash(self.source, "o2")
+        self.assertEqual(manifest.output_hash(self.source, self.dest), "o2")
+
+    def test_stale_when_images_change(self):
+        manifest = self.build(pages=[(self.source, self.dest, hash_bytes(b"a"))])
+        manifest.use_images({"/a.png": {"width": 1, "height": 1}})
+        manifest.save()
+        manifest = BuildManifest(self.manifest_path, "t1", "/")
+        manifest.use_images({"/a.png": {"width": 1, "height": 1}})
+        self.assertTrue(manifest.is_fresh(self.source, self.dest, hash_bytes(b"a")))
+        manifest.use_images(None)
+        self.assertFalse(manifest.is_fresh(self.source, self.dest, hash_bytes(b"a")))
+
+    def test_stale_when_minify_changes(self):
+        self.build(pages=[(self.source, self.dest, hash_bytes(b"a"))])
+        manifest = BuildManifest(self.manifest_path, "t1", "/")
+        manifest.use_minify(False)
+        self.assertTrue(manifest.is_fresh(self.source, self.dest, hash_bytes(b"a")))
+        manifest.use_minify(True)
+        self.assertFalse(manifest.is_fresh(self.source, self.dest, hash_bytes(b"a")))
+
+    def test_prune_deleted_sources(self):
+        self.build(pages=[(self.source, self.dest, hash_bytes(b"a"))])
+        manifest = BuildManifest(self.manifest_path, "t2", "/")
+        self.assertEqual(manifest.prune(), [self.dest])
+        self.assertFalse(self.dest.exists())
+
+    def test_corrupt_manifest(self):
+        self.manifest_path.write_text("not json")
+        manifest = BuildManifest(self.manifest_path, "t1", "/")
+        self.assertFalse(manifest.is_fresh(self.source, self.dest, hash_bytes(b"a")))
+
+
+if __name__ == "__main__":
+    unittest.main()
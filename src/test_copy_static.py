@@ -0,0 +1,95 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from copy_static import asset_urls, fingerprint_path, list_files, sync_static
+
+
+class TestSyncStatic(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.static = self.root / "static"
+        self.public = self.root / "public"
+        (self.static / "images").mkdir(parents=True)
+        (self.static / "index.css").write_text("body {}")
+        (self.static / "images" / "a.png").write_bytes(b"png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def sync(self, previous=(), **kwargs):
+        with redirect_stdout(io.StringIO()):
+            return sync_static(self.static, self.public, previous, **kwargs)
+
+    def test_list_files(self):
+        self.assertEqual(set(list_files(self.static)), {"index.css", "images/a.png"})
+
+    def test_copies_and_preserves_mtime(self):
+        files = self.sync()
+        self.assertEqual(files, {"index.css": "index.css", "images/a.png": "images/a.png"})
+        self.assertEqual((self.public / "images" / "a.png").read_bytes(), b"png")
+        self.assertEqual(
+            (self.public / "index.css").stat().st_mtime_ns,
+            (self.static / "index.css").stat().st_mtime_ns,
+        )
+
+    def test_skips_unchanged(self):
+        self.sync()
+        dest = self.public / "index.css"
+        dest.write_text("edit!!!")
+        os.utime(dest, ns=(0, (self.static / "index.css").stat().st_mtime_ns))
+        self.sync()
+        self.assertEqual(dest.read_text(), "edit!!!")
+        self.sync(checksum=True)
+        self.assertEqual(dest.read_text(), "body {}")
+
+    def test_removes_stale_but_keeps_other_outputs(self):
+        files = self.sync()
+        (self.public / "index.html").write_text("page")
+        (self.static / "images" / "a.png").unlink()
+        self.sync(files)
+        self.assertFalse((self.public / "images" / "a.png").exists())
+        self.assertTrue((self.public / "index.html").exists())
+
+    def test_fingerprint(self):
+        self.assertEqual(fingerprint_path("css/site.css", "0123456789abcdef"), "css/site.0123456789.css")
+        (self.static / "robots.txt").write_text("ok")
+        files = self.sync(fingerprint=True)
+        css = files["index.css"]
+        self.assertRegex(css, r"^index\.[0-9a-f]{10}\.css$")
+        self.assertEqual(files["robots.txt"], "robots.txt")
+        self.assertEqual((self.public / css).read_text(), "body {}")
+        self.assertEqual((self.public / "index.css").read_text(), "body {}")
+        self.assertEqual(asset_urls(files)["/index.css"], "/" + css)
+        self.assertNotIn("/robots.txt", asset_urls(files))
+        self.assertEqual(self.sync(files, fingerprint=True), files)
+
+        (self.static / "index.css").write_text("body { color: red }")
+        changed = self.sync(files, fingerprint=True)
+        self.assertNotEqual(changed["index.css"], css)
+        self.assertFalse((self.public / css).exists())
+        self.assertEqual((self.public / "index.css").read_text(), "body { color: red }")
+        self.assertEqual(self.sync(changed), {rel_path: rel_path for rel_path in changed})
+        self.assertFalse((self.public / changed["index.css"]).exists())
+        self.assertTrue((self.public / "index.css").exists())
+
+        files = self.sync(fingerprint=True)
+        (self.static / "index.css").unlink()
+        self.sync(files, fingerprint=True)
+        self.assertFalse((self.public / files["index.css"]).exists())
+        self.assertFalse((self.public / "index.css").exists())
+
+    def test_link(self):
+        self.sync(link=True)
+        self.assertEqual(
+            (self.public / "index.css").stat().st_ino,
+            (self.static / "index.css").stat().st_ino,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,25 @@
+import io
+import json
+import os
+import tempfile
 import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
 
-from generate_content import extract_title
+from ast_cache import AstCache
+from build_manifest import RENDER_VERSION, BuildManifest, hash_file
+import generate_content
+from generate_content import (
+    PageGenerationError,
+    PageTask,
+    extract_title,
+    generate_pages_recursive,
+    interleave_chunks,
+    page_template,
+    reset_page_templates,
+)
+from profiling import Profiler
+from template import Template
 
 
 class TestExtractTitle(unittest.TestCase):
@@ -46,5 +65,180 @@ no title
             pass
 
 
+class TestGeneratePages(unittest.TestCase):
+    def setUp(self):
+        # Builds print a line per page; keep the test output readable.
+        quiet = redirect_stdout(io.StringIO())
+        quiet.__enter__()
+        self.addCleanup(quiet.__exit__, None, None, None)
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.content = self.root / "content"
+        self.public = self.root / "public"
+        self.template = self.root / "template.html"
+        self.template.write_text("<title>{{ Title }}</title><main>{{ Content }}</main>")
+        for name in ["b", "a", "c/d"]:
+            path = self.content / name / "index.md"
+            path.parent.mkdir(parents=True)
+            path.write_text(f"# Page {name}\n\n[home](/)")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_parallel_matches_serial(self):
+        generate_pages_recursive(self.content, self.template, self.public, "/blog/", jobs=1)
+        serial = {p: p.read_text() for p in self.public.rglob("*.html")}
+        generate_pages_recursive(self.content, self.template, self.public, "/blog/", jobs=2)
+        parallel = {p: p.read_text() for p in self.public.rglob("*.html")}
+        self.assertEqual(serial, parallel)
+        self.assertEqual(
+            serial[self.public / "a" / "index.html"],
+            '<title>Page a</title><main><div><h1>Page a</h1><p><a href="/blog/">home</a></p></div></main>',
+        )
+
+    def test_parallel_results_keep_content_order(self):
+        (self.content / "c" / "d" / "index.md").write_text("# Page d\n\n" + "text " * 1000)
+        orders = []
+        for jobs in [1, 2]:
+            profiler = Profiler()
+            with redirect_stdout(io.StringIO()) as out:
+                generate_pages_recursive(self.content, self.template, self.public, "/", jobs=jobs, profiler=profiler)
+            orders.append(([path for path, _ in profiler.pages], out.getvalue()))
+        self.assertEqual(orders[0], orders[1])
+
+    def test_interleave_chunks(self):
+        work = [PageTask(Path(str(size)), Path(str(size)), None, size) for size in range(10)]
+        chunks = interleave_chunks(work, 3)
+        self.assertEqual([[task.size for task in chunk] for chunk in chunks], [[9, 6, 3, 0], [8, 5, 2], [7, 4, 1]])
+        self.assertEqual(len(interleave_chunks(work[:2], 8)), 2)
+
+    def test_batched_io_matches_streaming(self):
+        generate_pages_recursive(self.content, self.template, self.public, "/blog/")
+        streamed = {p: p.read_text() for p in self.public.rglob("*.html")}
+        generate_pages_recursive(self.content, self.template, self.public, "/blog/", io_threads=4)
+        batched = {p: p.read_text() for p in self.public.rglob("*.html")}
+        self.assertEqual(streamed, batched)
+
+    def test_front_matter(self):
+        (self.content / "b" / "index.md").write_text(
+            "---\ntitle: Custom\ntemplate: {}\n---\n# Heading\n".format(self.root / "alt.html")
+        )
+        (self.content / "c" / "d" / "index.md").write_text("---\ndraft: true\n---\n# Draft\n")
+        (self.root / "alt.html").write_text("ALT {{ Title }} {{ Content }}")
+        for io_threads in [0, 2]:
+            generate_pages_recursive(self.content, self.template, self.public, "/", io_threads=io_threads)
+            self.assertEqual(
+                (self.public / "b" / "index.html").read_text(),
+                "ALT Custom <div><h1>Heading</h1></div>",
+            )
+            self.assertFalse((self.public / "c" / "d" / "index.html").exists())
+
+    def test_edited_page_template_is_recompiled(self):
+        manifest_path = self.root / "manifest.json"
+        alt = self.root / "alt.html"
+        (self.content / "b" / "index.md").write_text("---\ntemplate: {}\n---\n# B\n".format(alt))
+        for version in ["V1", "V2"]:
+            alt.write_text(version + " {{ Title }}{{ Content }}")
+            manifest = BuildManifest(manifest_path, "t", "/")
+            generate_pages_recursive(self.content, self.template, self.public, "/", manifest=manifest)
+            manifest.save()
+            self.assertEqual((self.public / "b" / "index.html").read_text(), version + " B<div><h1>B</h1></div>")
+
+    def test_page_template_is_read_once_per_build(self):
+        alt = self.root / "alt.html"
+        alt.write_text("ALT {{ Title }}")
+        for name in ["a", "b"]:
+            (self.content / name / "index.md").write_text("---\ntemplate: {}\n---\n# {}\n".format(alt, name))
+        reset_page_templates()
+        meta = {"template": str(alt)}
+        first = page_template(meta, Template("x"), "/")
+        mtime_ns = alt.stat().st_mtime_ns
+        alt.write_text("NEW {{ Title }}")
+        os.utime(alt, ns=(mtime_ns, mtime_ns))
+        # Same size and mtime: the file is not read again.
+        self.assertIs(page_template(meta, Template("x"), "/"), first)
+        os.utime(alt, ns=(mtime_ns, mtime_ns + 1))
+        self.assertEqual(page_template(meta, Template("x"), "/").render(Title="t"), "NEW t")
+        with redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content, self.template, self.public, "/")
+        self.assertEqual(list(generate_content._template_files), [str(alt)])
+        self.assertEqual(len(generate_content._templates), 1)
+
+    def test_base_path_skips_literal_text(self):
+        (self.content / "a" / "index.md").write_text(
+            '# A\n\n[home](/) and `<a href="/x">`\n\n```\n<img src="/y">\n```\n'
+        )
+        generate_pages_recursive(self.content, self.template, self.public, "/blog/")
+        self.assertEqual(
+            (self.public / "a" / "index.html").read_text(),
+            '<title>A</title><main><div><h1>A</h1><p><a href="/blog/">home</a> and '
+            '<code>&lt;a href="/x"&gt;</code></p><pre><code>&lt;img src="/y"&gt;\n</code></pre></div></main>',
+        )
+
+    def test_summaries_survive_incremental_builds(self):
+        manifest_path = self.root / "manifest.json"
+        for io_threads in [0, 2, 0]:
+            manifest = BuildManifest(manifest_path, "t", "/")
+            generate_pages_recursive(
+                self.content, self.template, self.public, "/", manifest=manifest, io_threads=io_threads, summarize=True
+            )
+            manifest.save()
+            summary = manifest.pages[str(self.content / "a" / "index.md")]["summary"]
+            self.assertEqual(summary, {"title": "Page a", "excerpt": "home", "tokens": ["home", "page"]})
+
+    def test_rerendered_pages_keep_unchanged_outputs(self):
+        manifest_path = self.root / "manifest.json"
+        a = self.public / "a" / "index.html"
+        for build, options in enumerate([{}, {}, {"io_threads": 2}, {"jobs": 2}]):
+            if build > 1:
+                (self.content / "b" / "index.md").write_text(f"# Page b{build}")
+            for path in self.public.rglob("*.html"):
+                os.utime(path, ns=(0, 0))
+            # A new template hash makes every page stale, so all are rendered again.
+            manifest = BuildManifest(manifest_path, f"t{build}", "/")
+            generate_pages_recursive(self.content, self.template, self.public, "/", manifest=manifest, **options)
+            manifest.save()
+            self.assertEqual(manifest.pages[str(self.content / "a" / "index.md")]["output_hash"], hash_file(a))
+            if build > 0:
+                self.assertEqual(a.stat().st_mtime_ns, 0)
+            if build > 1:
+                self.assertNotEqual((self.public / "b" / "index.html").stat().st_mtime_ns, 0)
+                self.assertIn(f"Page b{build}", (self.public / "b" / "index.html").read_text())
+
+    def test_older_render_version_rerenders_every_page(self):
+        manifest_path = self.root / "manifest.json"
+        manifest = BuildManifest(manifest_path, "t", "/")
+        generate_pages_recursive(self.content, self.template, self.public, "/", manifest=manifest)
+        manifest.save()
+        data = json.loads(manifest_path.read_text())
+        data["render_version"] = RENDER_VERSION - 1
+        manifest_path.write_text(json.dumps(data))
+        outputs = {path: path.read_text() for path in self.public.rglob("*.html")}
+        for path in outputs:
+            path.write_text("rendered by an older version")
+
+        manifest = BuildManifest(manifest_path, "t", "/")
+        with redirect_stdout(io.StringIO()) as out:
+            generate_pages_recursive(self.content, self.template, self.public, "/", manifest=manifest)
+        self.assertEqual(out.getvalue().count(" * "), 3)
+        self.assertEqual({path: path.read_text() for path in outputs}, outputs)
+        manifest.save()
+        self.assertEqual(json.loads(manifest_path.read_text())["render_version"], RENDER_VERSION)
+
+    def test_large_sources_skip_the_ast_cache(self):
+        (self.content / "a" / "index.md").write_text("# Page a\n\n" + "long text " * 100)
+        cache_dir = self.root / "ast"
+        ast_cache = AstCache(cache_dir, max_source_bytes=100)
+        generate_pages_recursive(self.content, self.template, self.public, "/", ast_cache=ast_cache)
+        self.assertEqual(len(list(cache_dir.iterdir())), 2)
+        self.assertIn("<p>" + ("long text " * 100).strip() + "</p>", (self.public / "a" / "index.html").read_text())
+
+    def test_error_names_file(self):
+        (self.content / "b" / "index.md").write_text("no title here")
+        with self.assertRaises(PageGenerationError) as cm:
+            generate_pages_recursive(self.content, self.template, self.public, "/", jobs=2)
+        self.assertIn(str(self.content / "b" / "index.md"), str(cm.exception))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+
+import highlight
+from highlight import highlight_html, resolve_language
+
+
+class TestHighlight(unittest.TestCase):
+    def test_resolve_language(self):
+        self.assertEqual(resolve_language("py"), "python")
+        self.assertEqual(resolve_language("JS title=x"), "javascript")
+        self.assertEqual(resolve_language("brainfuck"), None)
+        self.assertEqual(resolve_language(""), None)
+
+    def test_python(self):
+        self.assertEqual(
+            highlight_html('def f():  # "no"\n    return "a<b" + 1', "python"),
+            '<span class="tok-keyword">def</span> f():  <span class="tok-comment"># "no"</span>\n'
+            '    <span class="tok-keyword">return</span> <span class="tok-string">"a&lt;b"</span> + '
+            '<span class="tok-number">1</span>',
+        )
+
+    def test_keywords_inside_strings_and_names(self):
+        self.assertEqual(
+            highlight_html("let defer = 'if'", "javascript"),
+            '<span class="tok-keyword">let</span> defer = <span class="tok-string">\'if\'</span>',
+        )
+
+    def test_bash(self):
+        self.assertEqual(
+            highlight_html("echo ${#x} $HOME # c", "bash"),
+            '<span class="tok-keyword">echo</span> <span class="tok-variable">${#x}</span> '
+            '<span class="tok-variable">$HOME</span> <span class="tok-comment"># c</span>',
+        )
+
+    def test_css_selectors_are_not_numbers(self):
+        self.assertEqual(
+            highlight_html("h1 { margin: 0 }", "css"),
+            'h1 { margin: <span class="tok-number">0</span> }',
+        )
+        self.assertEqual(
+            highlight_html("#add { color: #add; }", "css"),
+            '#add { color: <span class="tok-number">#add</span>; }',
+        )
+        self.assertEqual(
+            highlight_html(".col-2 { width: -50% }", "css"),
+            '.col-2 { width: <span class="tok-number">-50%</span> }',
+        )
+
+    def test_cached(self):
+        html = highlight.highlight("x = 1", "python")
+        self.assertIs(highlight.highlight("x = 1", "python"), html)
+        self.assertIn(("python", highlight.hash_bytes(b"x = 1")), highlight._cache)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
+import io
 import unittest
-from html_node import LeafNode, ParentNode, HTMLNode
+from html_node import FrozenLeafNode, LeafNode, ParentNode, HTMLNode, escape_attribute, escape_text
 
 
 class TestHTMLNode(unittest.TestCase):
@@ -101,6 +102,73 @@ class TestHTMLNode(unittest.TestCase):
             "<h2><b>Bold text</b>Normal text<i>italic text</i>Normal text</h2>",
         )
 
+    def test_write_html(self):
+        node = ParentNode(
+            "p",
+            [LeafNode("a", "link", {"href": "/x"}), LeafNode(None, " text")],
+        )
+        out = io.StringIO()
+        node.write_html(out)
+        self.assertEqual(out.getvalue(), '<p><a href="/x">link</a> text</p>')
+        self.assertEqual(out.getvalue(), node.to_html())
+
+    def test_rewrite_url_only_touches_url_props(self):
+        node = ParentNode(
+            "p",
+            [
+                LeafNode("a", "link", {"href": "/x", "title": "/x"}),
+                LeafNode("img", "", {"src": "/i.png", "alt": "i"}),
+                LeafNode("code", 'href="/literal'),
+            ],
+        )
+        self.assertEqual(
+            node.to_html(lambda url: "/base" + url),
+            '<p><a href="/base/x" title="/x">link</a><img src="/base/i.png" alt="i"></img>'
+            '<code>href="/literal</code></p>',
+        )
+
+    def test_image_attrs_only_touch_img(self):
+        node = ParentNode(
+            "p",
+            [LeafNode("img", "", {"src": "/i.png", "alt": "i"}), LeafNode("a", "link", {"href": "/i.png"})],
+        )
+        self.assertEqual(
+            node.to_html(lambda url: "/base" + url, lambda src: f' data-src="{src}"'),
+            '<p><img src="/base/i.png" alt="i" data-src="/i.png"></img><a href="/base/i.png">link</a></p>',
+        )
+
+    def test_escaping(self):
+        node = ParentNode(
+            "p",
+            [
+                LeafNode(None, "a < b && c > d \"q\""),
+                LeafNode("a", "x", {"href": "/s?a=1&b=2", "title": 'say "hi" <now>'}),
+                LeafNode(None, "<b>trusted</b>", raw=True),
+                FrozenLeafNode(None, "<i>also</i>", raw=True),
+            ],
+        )
+        self.assertEqual(
+            node.to_html(),
+            '<p>a &lt; b &amp;&amp; c &gt; d "q"'
+            '<a href="/s?a=1&amp;b=2" title="say &quot;hi&quot; &lt;now&gt;">x</a>'
+            "<b>trusted</b><i>also</i></p>",
+        )
+
+    def test_escape_fast_path_returns_same_string(self):
+        text = "plain text"
+        self.assertIs(escape_text(text), text)
+        self.assertIs(escape_attribute(text), text)
+        self.assertEqual(escape_attribute("&"), "&amp;")
+        self.assertIs(escape_attribute("a&b"), escape_attribute("a&b"))
+
+    def test_to_html_not_implemented(self):
+        with self.assertRaises(NotImplementedError):
+            HTMLNode("p", "text").to_html()
+
+    def test_nodes_have_no_dict(self):
+        for node in [LeafNode("b", "x"), ParentNode("p", []), HTMLNode()]:
+            self.assertFalse(hasattr(node, "__dict__"))
+
 
 if __name__ == "__main__":
     unittest.main()
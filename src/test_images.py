@@ -0,0 +1,129 @@
+import io
+import struct
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import images
+from build_manifest import hash_file
+from images import (
+    LAZY_ATTRIBUTES,
+    collect_images,
+    image_attribute_writer,
+    parse_widths,
+    read_image_size,
+    remove_stale_variants,
+    variant_path,
+)
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00\x00\x00\x0dIHDR" + struct.pack(">II", 300, 200) + b"\x08\x06\x00\x00\x00"
+GIF = b"GIF89a" + struct.pack("<HH", 30, 20) + b"\x00" * 20
+JPEG = (
+    b"\xff\xd8"
+    + b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+    + b"\xff\xc4" + struct.pack(">H", 4) + b"\x00\x00"
+    + b"\xff\xff\xc2" + struct.pack(">HBHH", 11, 8, 120, 640) + b"\x03\x01\x11\x00"
+)
+WEBP = (
+    b"RIFF\x00\x00\x00\x00WEBPVP8X\x0a\x00\x00\x00"
+    + b"\x00" * 4
+    + (799).to_bytes(3, "little")
+    + (599).to_bytes(3, "little")
+)
+
+
+class TestImages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.static = self.root / "static"
+        self.public = self.root / "public"
+        (self.static / "images").mkdir(parents=True)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path, data):
+        path = self.static / rel_path
+        path.write_bytes(data)
+        return path
+
+    def test_read_image_size(self):
+        self.assertEqual(read_image_size(self.write("a.png", PNG)), (300, 200))
+        self.assertEqual(read_image_size(self.write("a.gif", GIF)), (30, 20))
+        self.assertEqual(read_image_size(self.write("a.jpg", JPEG)), (640, 120))
+        self.assertEqual(read_image_size(self.write("a.webp", WEBP)), (800, 600))
+        self.assertIsNone(read_image_size(self.write("a.bmp", b"BM" + b"\x00" * 40)))
+        self.assertIsNone(read_image_size(self.write("b.jpg", JPEG[:30])))
+
+    def test_parse_widths(self):
+        self.assertEqual(parse_widths("960, 480,480"), (480, 960))
+        with self.assertRaises(ValueError):
+            parse_widths("0")
+
+    def test_variant_path(self):
+        self.assertEqual(variant_path("images/a.png", "1a2b3c4d5e6f", 480), "images/a.1a2b3c4d5e.480w.png")
+
+    def test_collect_sizes(self):
+        self.write("images/a.png", PNG)
+        self.write("images/b.gif", GIF)
+        self.write("index.css", b"body {}")
+        static_files = ["images/a.png", "images/b.gif", "index.css"]
+        with redirect_stdout(io.StringIO()):
+            found = collect_images(self.static, self.public, self.root / "cache", static_files)
+        self.assertEqual(
+            found,
+            {"/images/a.png": {"width": 300, "height": 200}, "/images/b.gif": {"width": 30, "height": 20}},
+        )
+
+    @unittest.skipIf(images.Image is None, "Pillow is not installed")
+    def test_collect_variants_cached(self):
+        images.Image.new("RGB", (300, 200)).save(self.static / "images" / "a.png")
+        cache = self.root / "cache"
+        digests = {}
+        with redirect_stdout(io.StringIO()):
+            found = collect_images(self.static, self.public, cache, ["images/a.png"], (100, 300), digests=digests)
+        self.assertEqual(digests["images/a.png"][2], hash_file(self.static / "images" / "a.png"))
+        [[width, url]] = found["/images/a.png"]["variants"]
+        self.assertEqual(width, 100)
+        self.assertEqual(read_image_size(self.public / url[1:]), (100, 67))
+        cached = next(cache.iterdir()).stat().st_mtime_ns
+        (self.public / url[1:]).unlink()
+        with redirect_stdout(io.StringIO()) as out:
+            self.assertEqual(collect_images(self.static, self.public, cache, ["images/a.png"], (100, 300)), found)
+        self.assertIn("(0 generated)", out.getvalue())
+        self.assertEqual(next(cache.iterdir()).stat().st_mtime_ns, cached)
+        self.assertTrue((self.public / url[1:]).exists())
+
+    def test_remove_stale_variants(self):
+        (self.public / "images").mkdir(parents=True)
+        (self.public / "images" / "a.1.480w.png").write_bytes(b"old")
+        (self.public / "images" / "a.2.480w.png").write_bytes(b"new")
+        previous = {"/images/a.png": {"width": 900, "height": 600, "variants": [[480, "/images/a.1.480w.png"]]}}
+        current = {"/images/a.png": {"width": 900, "height": 600, "variants": [[480, "/images/a.2.480w.png"]]}}
+        removed = remove_stale_variants(self.public, previous, current)
+        self.assertEqual(removed, [self.public / "images" / "a.1.480w.png"])
+        self.assertEqual(remove_stale_variants(self.public, current, None), [self.public / "images" / "a.2.480w.png"])
+        self.assertEqual(remove_stale_variants(self.public, None, None), [])
+
+    def test_image_attributes(self):
+        self.assertIsNone(image_attribute_writer(None))
+        image_attrs = image_attribute_writer(
+            {
+                "/a.png": {"width": 900, "height": 600, "variants": [[480, "/a.1.480w.png"]]},
+                "/b.png": {"width": 30, "height": 20},
+            },
+            lambda url: "/blog" + url,
+        )
+        self.assertEqual(
+            image_attrs("/a.png"),
+            ' width="900" height="600" srcset="/blog/a.1.480w.png 480w, /blog/a.png 900w"'
+            ' sizes="(max-width: 900px) 100vw, 900px" loading="lazy" decoding="async"',
+        )
+        self.assertEqual(image_attrs("/b.png"), ' width="30" height="20"' + LAZY_ATTRIBUTES)
+        self.assertEqual(image_attrs("https://example.com/c.png"), LAZY_ATTRIBUTES)
+
+
+if __name__ == "__main__":
+    unittest.main()
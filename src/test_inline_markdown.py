@@ -191,6 +191,38 @@ class TestInlineMarkdown(unittest.TestCase):
             nodes,
         )
 
+    def test_text_to_textnodes_many_links(self):
+        text = " ".join(f"[l{i}](/p/{i})" for i in range(3))
+        self.assertListEqual(
+            [
+                TextNode("l0", TextType.LINK, "/p/0"),
+                TextNode(" ", TextType.TEXT),
+                TextNode("l1", TextType.LINK, "/p/1"),
+                TextNode(" ", TextType.TEXT),
+                TextNode("l2", TextType.LINK, "/p/2"),
+            ],
+            text_to_textnodes(text),
+        )
+
+    def test_text_to_textnodes_delimiters_inside_spans(self):
+        nodes = text_to_textnodes("`snake_case` and [docs](/a_b_c)")
+        self.assertListEqual(
+            [
+                TextNode("snake_case", TextType.CODE),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("docs", TextType.LINK, "/a_b_c"),
+            ],
+            nodes,
+        )
+
+    def test_text_to_textnodes_literal_brackets(self):
+        nodes = text_to_textnodes("a [b] c! d")
+        self.assertListEqual([TextNode("a [b] c! d", TextType.TEXT)], nodes)
+
+    def test_text_to_textnodes_unclosed(self):
+        with self.assertRaises(ValueError):
+            text_to_textnodes("this is **not closed")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,8 +1,16 @@
+import io
 import unittest
 from markdown_blocks import (
     markdown_to_html_node,
     markdown_to_blocks,
     block_to_block_type,
+    iter_blocks,
+    write_markdown_html,
+    inline_cache_info,
+    set_inline_cache_size,
+    text_to_children,
+    classify_blocks,
+    BLOCK_TYPES,
     BlockType,
 )
 
@@ -65,6 +73,44 @@ This is the same paragraph on a new line
         block = "paragraph"
         self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
 
+    def test_classify_blocks(self):
+        blocks = [
+            "# heading",
+            "####### too deep",
+            "```\ncode\n```",
+            "```\nunclosed",
+            "> quote\n>more",
+            "> quote\nnot quote",
+            "- a\n- b",
+            "- a\n-b",
+            "1. a\n2. b\n3. c",
+            "1. a\n3. b",
+            "1. a\n2.b",
+            "\n".join(f"{i}. item" for i in range(1, 1201)),
+            "paragraph",
+        ]
+        codes = classify_blocks(blocks)
+        self.assertEqual(codes.typecode, "B")
+        self.assertEqual(
+            [BLOCK_TYPES[code] for code in codes],
+            [
+                BlockType.HEADING,
+                BlockType.PARAGRAPH,
+                BlockType.CODE,
+                BlockType.PARAGRAPH,
+                BlockType.QUOTE,
+                BlockType.PARAGRAPH,
+                BlockType.ULIST,
+                BlockType.PARAGRAPH,
+                BlockType.OLIST,
+                BlockType.PARAGRAPH,
+                BlockType.PARAGRAPH,
+                BlockType.OLIST,
+                BlockType.PARAGRAPH,
+            ],
+        )
+        self.assertEqual([BLOCK_TYPES[code] for code in codes], [block_to_block_type(b) for b in blocks])
+
     def test_paragraph(self):
         md = """
 This is **bolded** paragraph
@@ -163,6 +209,96 @@ the **same** even with inline stuff
             "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>",
         )
 
+    def test_one_line_fence_does_not_open_code_block(self):
+        md = "```x``` starts\n\n## H2\n\nparagraph"
+        self.assertEqual(markdown_to_blocks(md), ["```x``` starts", "## H2", "paragraph"])
+
+    def test_unterminated_fence_splits_at_blank_lines(self):
+        md = "intro\n\n```\ncode\n\n## H2\n\nparagraph\n"
+        self.assertEqual(markdown_to_blocks(md), ["intro", "```\ncode", "## H2", "paragraph"])
+
+    def test_codeblock_with_blank_lines(self):
+        md = """
+```
+first
+
+second
+```
+after
+"""
+
+        blocks = markdown_to_blocks(md)
+        self.assertEqual(blocks, ["```\nfirst\n\nsecond\n```", "after"])
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(
+            html,
+            "<div><pre><code>first\n\nsecond\n</code></pre><p>after</p></div>",
+        )
+
+    def test_codeblock_with_language(self):
+        md = """
+```py
+x = "<b>"  # note
+```
+
+```text
+<plain>
+```
+"""
+
+        html = markdown_to_html_node(md).to_html()
+        self.assertEqual(
+            html,
+            '<div><pre><code class="language-py">x = <span class="tok-string">"&lt;b&gt;"</span>  '
+            '<span class="tok-comment"># note</span>\n</code></pre>'
+            '<pre><code class="language-text">&lt;plain&gt;\n</code></pre></div>',
+        )
+
+    def test_iter_blocks_file_lines(self):
+        lines = io.StringIO("# title\n\npara one\nstill one\n\n\n- item\n")
+        self.assertEqual(
+            list(iter_blocks(lines)),
+            ["# title", "para one\nstill one", "- item"],
+        )
+
+    def test_write_markdown_html(self):
+        md = "# title\n\nsome **bold** text\n"
+        out = io.StringIO()
+        write_markdown_html(io.StringIO(md), out)
+        self.assertEqual(out.getvalue(), markdown_to_html_node(md).to_html())
+
+
+class TestInlineCache(unittest.TestCase):
+    def tearDown(self):
+        set_inline_cache_size(0)
+
+    def test_cached_output_matches(self):
+        md = "# **title**\n\n- a [link](/x) and `code`\n- ![img](/i.png) _it_\n\nplain text"
+        expected = markdown_to_html_node(md).to_html(lambda url: "/base" + url)
+        set_inline_cache_size(16)
+        self.assertEqual(markdown_to_html_node(md).to_html(lambda url: "/base" + url), expected)
+        self.assertEqual(markdown_to_html_node(md).to_html(lambda url: "/base" + url), expected)
+
+    def test_stats(self):
+        self.assertIsNone(inline_cache_info())
+        set_inline_cache_size(1)
+        text_to_children("a **b**")
+        text_to_children("a **b**")
+        text_to_children("c")
+        info = inline_cache_info()
+        self.assertEqual((info.hits, info.misses, info.currsize, info.maxsize), (1, 2, 1, 1))
+
+    def test_entries_are_immutable(self):
+        set_inline_cache_size(4)
+        children = text_to_children("see [docs](/docs)")
+        children.append(None)
+        link = text_to_children("see [docs](/docs)")[1]
+        with self.assertRaises(AttributeError):
+            link.value = "changed"
+        with self.assertRaises(TypeError):
+            link.props["href"] = "/changed"
+        self.assertEqual(len(text_to_children("see [docs](/docs)")), 2)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from build_manifest import hash_bytes
+from page_io import BackgroundWriter, make_output_dirs, prefetch, write_atomic
+
+
+class TestPageIO(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_write_atomic_creates_parents(self):
+        dest = self.root / "a" / "b" / "index.html"
+        write_atomic(dest, lambda f: f.write("hello"))
+        self.assertEqual(dest.read_text(), "hello")
+        self.assertEqual([p.name for p in dest.parent.iterdir()], ["index.html"])
+
+    def test_write_atomic_skips_unchanged(self):
+        dest = self.root / "index.html"
+        self.assertTrue(write_atomic(dest, lambda f: f.write("hello"))[0])
+        os.utime(dest, ns=(0, 0))
+        self.assertFalse(write_atomic(dest, lambda f: f.write("hello"))[0])
+        self.assertEqual(dest.stat().st_mtime_ns, 0)
+        self.assertTrue(write_atomic(dest, lambda f: f.write("hullo"))[0])
+        self.assertEqual(dest.read_text(), "hullo")
+        self.assertEqual([p.name for p in self.root.iterdir()], ["index.html"])
+
+    def test_write_atomic_compares_previous_hash(self):
+        dest = self.root / "index.html"
+        replaced, output_hash = write_atomic(dest, lambda f: f.write("hel" + "lo" * 40000))
+        self.assertTrue(replaced)
+        self.assertEqual(output_hash, hash_bytes(("hel" + "lo" * 40000).encode()))
+        self.assertEqual(write_atomic(dest, lambda f: f.write("hello"))[1], hash_bytes(b"hello"))
+        os.utime(dest, ns=(0, 0))
+        # A matching recorded hash is trusted without reading the file back.
+        self.assertFalse(write_atomic(dest, lambda f: f.write("hello"), hash_bytes(b"hello"))[0])
+        self.assertEqual(dest.stat().st_mtime_ns, 0)
+        self.assertTrue(write_atomic(dest, lambda f: f.write("hello"), hash_bytes(b"hullo"))[0])
+        dest.unlink()
+        self.assertTrue(write_atomic(dest, lambda f: f.write("hello"), hash_bytes(b"hello"))[0])
+        self.assertEqual(dest.read_text(), "hello")
+
+    def test_make_output_dirs(self):
+        dests = [self.root / "a" / "b" / "x.html", self.root / "a" / "y.html", self.root / "c" / "z.html"]
+        make_output_dirs(dests)
+        for dest in dests:
+            self.assertTrue(dest.parent.is_dir())
+
+    def test_prefetch_in_order(self):
+        paths = []
+        for i in range(20):
+            path = self.root / f"{i}.md"
+            path.write_text(str(i))
+            paths.append(path)
+        self.assertEqual(list(prefetch(paths, threads=3, lookahead=2)), [str(i) for i in range(20)])
+
+    def test_background_writer(self):
+        with BackgroundWriter(threads=2, max_pending=2) as writer:
+            for i in range(10):
+                writer.submit(self.root / f"{i}.html", f"page {i}")
+        self.assertEqual((self.root / "7.html").read_text(), "page 7")
+
+    def test_background_writer_error(self):
+        blocker = self.root / "file"
+        blocker.write_text("not a directory")
+        with self.assertRaises(OSError) as cm:
+            with BackgroundWriter(threads=1) as writer:
+                writer.submit(blocker / "x.html", "page")
+        self.assertIn("x.html", str(cm.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
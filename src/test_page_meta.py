@@ -0,0 +1,56 @@
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+from page_meta import parse_value, read_header, read_page_meta, split_front_matter
+
+
+class TestPageMeta(unittest.TestCase):
+    def test_parse_value(self):
+        self.assertEqual(parse_value(" true"), True)
+        self.assertEqual(parse_value("False"), False)
+        self.assertEqual(parse_value("[a, 'b c']"), ["a", "b c"])
+        self.assertEqual(parse_value('"quoted: yes"'), "quoted: yes")
+        self.assertEqual(parse_value("2024-05-01"), "2024-05-01")
+
+    def test_front_matter(self):
+        meta, body = split_front_matter(
+            "---\ndate: 2024-05-01\ntags: [tolkien, elves]\ndraft: false\n---\n# Title\n\nText\n"
+        )
+        self.assertEqual(
+            meta,
+            {"date": "2024-05-01", "tags": ["tolkien", "elves"], "draft": False, "title": "Title"},
+        )
+        self.assertEqual(body, "# Title\n\nText\n")
+
+    def test_front_matter_title_wins(self):
+        meta, body = split_front_matter("---\ntitle: Custom\n---\n# Heading\n")
+        self.assertEqual(meta["title"], "Custom")
+        self.assertEqual(body, "# Heading\n")
+
+    def test_no_front_matter(self):
+        meta, body = split_front_matter("intro\n\n# Title\n")
+        self.assertEqual(meta, {"title": "Title"})
+        self.assertEqual(body, "intro\n\n# Title\n")
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            split_front_matter("---\ntitle: x\n")
+        with self.assertRaises(ValueError):
+            split_front_matter("no title")
+
+    def test_read_header_stops_at_title(self):
+        stream = io.StringIO("# Title\n\n" + "line\n" * 1000)
+        read_header(stream)
+        self.assertEqual(stream.tell(), len("# Title\n"))
+
+    def test_read_page_meta(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "page.md"
+            path.write_text("---\ndraft: true\n---\n# Draft\n")
+            self.assertEqual(read_page_meta(path), {"draft": True, "title": "Draft"})
+
+
+if __name__ == "__main__":
+    unittest.main()
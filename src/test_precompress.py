@@ -0,0 +1,83 @@
+import gzip
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import precompress
+from precompress import precompress as compress, remove_siblings
+
+
+class TestPrecompress(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.public = Path(self.tmp.name)
+        (self.public / "blog").mkdir()
+        (self.public / "index.html").write_text("<p>home</p>" * 50)
+        (self.public / "blog" / "index.html").write_text("<p>blog</p>" * 50)
+        (self.public / "a.png").write_bytes(b"png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_compress(self, previous=None, **kwargs):
+        with redirect_stdout(io.StringIO()) as out:
+            result = compress(self.public, previous, **kwargs)
+        return result, out.getvalue()
+
+    def test_writes_gzip_siblings(self):
+        result, out = self.run_compress(brotli_level=None)
+        self.assertEqual(sorted(result["files"]), ["blog/index.html", "index.html"])
+        self.assertIn("2 compressed (.gz)", out)
+        data = gzip.decompress((self.public / "index.html.gz").read_bytes())
+        self.assertEqual(data, (self.public / "index.html").read_bytes())
+        self.assertFalse((self.public / "a.png.gz").exists())
+
+    def test_skips_unchanged_files(self):
+        result, _ = self.run_compress(brotli_level=None)
+        os.utime(self.public / "index.html.gz", ns=(0, 0))
+        (self.public / "blog" / "index.html").write_text("<p>changed</p>")
+        result, out = self.run_compress(result, brotli_level=None)
+        self.assertIn("1 compressed (.gz), 1 unchanged", out)
+        self.assertEqual((self.public / "index.html.gz").stat().st_mtime_ns, 0)
+        self.assertEqual(gzip.decompress((self.public / "blog" / "index.html.gz").read_bytes()), b"<p>changed</p>")
+
+        _, out = self.run_compress(result, gzip_level=1, brotli_level=None)
+        self.assertIn("2 compressed", out)
+
+    def test_reuses_digests_of_files_with_unchanged_stat(self):
+        result, _ = self.run_compress(brotli_level=None)
+        size, mtime_ns, _ = result["files"]["index.html"]
+        result["files"]["index.html"] = [size, mtime_ns, "recorded"]
+        result, out = self.run_compress(result, brotli_level=None)
+        self.assertIn("0 compressed (.gz), 2 unchanged", out)
+        self.assertEqual(result["files"]["index.html"][2], "recorded")
+
+        os.utime(self.public / "index.html", ns=(0, 0))
+        result, out = self.run_compress(result, brotli_level=None)
+        self.assertIn("1 compressed (.gz), 1 unchanged", out)
+        self.assertNotEqual(result["files"]["index.html"][2], "recorded")
+
+    def test_removes_siblings_of_deleted_files(self):
+        result, _ = self.run_compress(brotli_level=None)
+        (self.public / "blog" / "index.html").unlink()
+        result, out = self.run_compress(result, brotli_level=None)
+        self.assertIn("1 removed", out)
+        self.assertFalse((self.public / "blog" / "index.html.gz").exists())
+        self.assertEqual(remove_siblings(self.public, result["files"]), 1)
+        self.assertFalse((self.public / "index.html.gz").exists())
+
+    @unittest.skipIf(precompress.brotli is None, "brotli is not installed")
+    def test_writes_brotli_siblings(self):
+        result, out = self.run_compress(brotli_level=5)
+        self.assertIn("(.gz, .br)", out)
+        data = precompress.brotli.decompress((self.public / "index.html.br").read_bytes())
+        self.assertEqual(data, (self.public / "index.html").read_bytes())
+        self.run_compress(result, brotli_level=None)
+        self.assertFalse((self.public / "index.html.br").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
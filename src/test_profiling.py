@@ -0,0 +1,53 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from generate_content import generate_page
+from profiling import STAGES, Profiler, percentile, profile_page
+from template import Template
+
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.source = self.root / "index.md"
+        self.source.write_text("# Title\n\nSome **bold** [link](/x)\n\n- a\n- b\n")
+        self.template = Template('<link href="/a.css">{{ Title }}{{ Content }}', "/site/")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_profile_page_matches_generate_page(self):
+        generate_page(self.source, self.template, self.root / "plain.html", "/site/")
+        result = profile_page(self.source, self.template, self.root / "profiled.html", "/site/")
+        self.assertEqual(
+            (self.root / "plain.html").read_text(),
+            (self.root / "profiled.html").read_text(),
+        )
+        self.assertEqual(set(result["stages"]), set(STAGES))
+
+    def test_report_and_trace(self):
+        profiler = Profiler()
+        for name in ["a", "b"]:
+            result = profile_page(self.source, self.template, self.root / f"{name}.html", "/")
+            profiler.add(Path(f"{name}.md"), result)
+        report = profiler.report(top=1)
+        self.assertIn("Profiled 2 pages", report)
+        self.assertIn("Slowest 1 pages:", report)
+
+        trace_path = self.root / "trace.json"
+        profiler.write_trace(trace_path)
+        events = json.loads(trace_path.read_text())["traceEvents"]
+        self.assertEqual(len(events), 2 * (1 + len(STAGES)))
+
+    def test_percentile(self):
+        values = [1.0, 2.0, 3.0, 4.0]
+        self.assertEqual(percentile(values, 0.5), 2.0)
+        self.assertEqual(percentile(values, 1.0), 4.0)
+        self.assertEqual(percentile([], 0.5), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
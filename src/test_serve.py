@@ -0,0 +1,72 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from main import build, build_parser
+from serve import output_path, rebuild, snapshot, watched_paths
+
+
+class TestServeRebuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cwd = os.getcwd()
+        os.chdir(self.tmp.name)
+        Path("content/blog").mkdir(parents=True)
+        Path("static").mkdir()
+        Path("template.html").write_text("{{ Title }}|{{ Content }}")
+        Path("content/index.md").write_text("# Home")
+        Path("content/blog/post.md").write_text("# Post")
+        Path("static/site.css").write_text("body {}")
+        self.args = build_parser().parse_args([])
+        self.quiet = redirect_stdout(io.StringIO())
+        self.quiet.__enter__()
+        self.manifest = build(self.args)
+
+    def tearDown(self):
+        self.quiet.__exit__(None, None, None)
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def test_output_path(self):
+        self.assertEqual(output_path(Path("content/blog/post.md")), Path("public/blog/post.html"))
+        self.assertEqual(output_path(Path("static/site.css")), Path("public/site.css"))
+
+    def test_rebuild_only_touched_files(self):
+        index_mtime = Path("public/index.html").stat().st_mtime_ns
+        Path("content/blog/post.md").write_text("# Edited")
+        Path("static/site.css").write_text("body { margin: 0 }")
+
+        rebuild(
+            self.args,
+            self.manifest,
+            {Path("content/blog/post.md"), Path("static/site.css")},
+            set(),
+        )
+        self.assertEqual(Path("public/blog/post.html").read_text(), "Edited|<div><h1>Edited</h1></div>")
+        self.assertEqual(Path("public/site.css").read_text(), "body { margin: 0 }")
+        self.assertEqual(Path("public/index.html").stat().st_mtime_ns, index_mtime)
+
+    def test_rebuild_deleted_page(self):
+        Path("content/blog/post.md").unlink()
+        rebuild(self.args, self.manifest, set(), {Path("content/blog/post.md")})
+        self.assertFalse(Path("public/blog/post.html").exists())
+        self.assertNotIn(str(Path("content/blog/post.md")), self.manifest.pages)
+
+    def test_rebuild_ignores_non_markdown(self):
+        Path("content/.DS_Store").write_bytes(b"\0")
+        rebuild(self.args, self.manifest, {Path("content/.DS_Store")}, set())
+        self.assertFalse(Path("public/.DS_Store.html").exists())
+        self.assertFalse(Path("public/.html").exists())
+
+    def test_snapshot(self):
+        files = snapshot(watched_paths)
+        self.assertIn(Path("template.html"), files)
+        self.assertIn(Path("content/blog/post.md"), files)
+        self.assertIn(Path("static/site.css"), files)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from html_node import LeafNode
+from markdown_blocks import markdown_to_html_node
+from site_files import PageSummary, node_text, page_url, write_site_files
+
+
+class TestPageSummary(unittest.TestCase):
+    def test_node_text(self):
+        node = markdown_to_html_node("some **bold** [link](/x)\n\n- one\n- two")
+        self.assertEqual(node_text(node.children[0]), "some bold link")
+        self.assertEqual(node_text(node.children[1]).split(), ["one", "two"])
+        self.assertEqual(node_text(LeafNode("code", "a < b")), "a < b")
+        self.assertEqual(node_text(LeafNode(None, "<b>a</b> &amp; b", raw=True)), "a & b")
+
+    def test_summary(self):
+        node = markdown_to_html_node("# The Title\n\nFirst _para_.\n\n```\ncode_word\n```\n\nSecond para.")
+        summary = PageSummary.from_blocks(node.children).to_dict({"title": "The Title", "date": "2024-05-01"})
+        self.assertEqual(summary["excerpt"], "First para. Second para.")
+        self.assertEqual(summary["tokens"], ["code_word", "first", "para", "second", "the", "title"])
+        self.assertEqual(summary["date"], "2024-05-01")
+
+    def test_excerpt_is_cut_at_a_word(self):
+        summary = PageSummary(excerpt_length=12)
+        summary.add(markdown_to_html_node("alpha beta gamma delta").children[0])
+        self.assertEqual(summary.excerpt(), "alpha beta…")
+
+
+class TestSiteFiles(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.public = Path(self.tmp.name)
+        self.pages = {
+            "content/index.md": {
+                "output": str(self.public / "index.html"),
+                "summary": {"title": "Home & Co", "excerpt": "Welcome", "tokens": ["home", "welcome"]},
+            },
+            "content/post.md": {
+                "output": str(self.public / "post.html"),
+                "summary": {"title": "Post", "excerpt": "News", "tokens": ["news", "welcome"], "date": "2024-05-01"},
+            },
+            "content/old.md": {"output": str(self.public / "old.html")},
+        }
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_page_url(self):
+        self.assertEqual(page_url(self.public / "index.html", self.public, "/blog/"), "/blog/")
+        self.assertEqual(page_url(self.public / "a" / "index.html", self.public, "/"), "/a/")
+        self.assertEqual(page_url(self.public / "a.html", self.public, "/"), "/a.html")
+
+    def test_search_index_only(self):
+        written = write_site_files(self.pages, self.public, "/", search_index=True)
+        self.assertEqual(written, [self.public / "search-index.json"])
+        index = json.loads((self.public / "search-index.json").read_text())
+        self.assertEqual(index["pages"], [["/", "Home & Co", "Welcome"], ["/post.html", "Post", "News"]])
+        self.assertEqual(index["tokens"], {"home": [0], "news": [1], "welcome": [0, 1]})
+
+    def test_sitemap_and_feed(self):
+        write_site_files(self.pages, self.public, "/site/", site_url="https://example.com/")
+        sitemap = (self.public / "sitemap.xml").read_text()
+        self.assertIn("<loc>https://example.com/site/</loc>", sitemap)
+        self.assertIn("<loc>https://example.com/site/post.html</loc><lastmod>2024-05-01</lastmod>", sitemap)
+        feed = (self.public / "feed.xml").read_text()
+        self.assertIn("<title>Home &amp; Co</title>", feed)
+        self.assertIn("<pubDate>Wed, 01 May 2024 00:00:00 +0000</pubDate>", feed)
+        self.assertLess(feed.index("<title>Post</title>"), feed.rindex("<title>Home &amp; Co</title>"))
+        self.assertFalse((self.public / "search-index.json").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
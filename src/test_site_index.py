@@ -0,0 +1,42 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from site_index import build_site_index, matches
+
+
+class TestSiteIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = Path(self.tmp.name) / "content"
+        self.public = Path(self.tmp.name) / "public"
+        for rel_path in ["index.md", "b/index.md", "a-b/index.md", "a/index.md", "drafts/x.md", "a/.DS_Store"]:
+            path = self.content / rel_path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text("# hi")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_index(self):
+        pages = build_site_index(self.content, self.public)
+        self.assertEqual(
+            [page.rel_path for page in pages],
+            ["a/index.md", "a-b/index.md", "b/index.md", "drafts/x.md", "index.md"],
+        )
+        self.assertEqual(pages[0].source, self.content / "a" / "index.md")
+        self.assertEqual(pages[0].dest, self.public / "a" / "index.html")
+        self.assertEqual(pages[0].size, 4)
+
+    def test_exclude(self):
+        pages = build_site_index(self.content, self.public, exclude=["drafts/*"])
+        self.assertNotIn("drafts/x.md", [page.rel_path for page in pages])
+
+    def test_matches(self):
+        self.assertTrue(matches("a/b/index.md", ["*.md"]))
+        self.assertTrue(matches("drafts/x.md", ["drafts/*"]))
+        self.assertFalse(matches("a/.DS_Store", ["*.md"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
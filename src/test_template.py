@@ -0,0 +1,100 @@
+import io
+import unittest
+
+from template import Template, base_path_rewriter, minify_html, rewrite_base_path
+
+
+class TestTemplate(unittest.TestCase):
+    def test_render(self):
+        template = Template("<title>{{ Title }}</title><body>{{ Content }}</body>")
+        self.assertEqual(
+            template.render(Title="Hi", Content="<p>text</p>"),
+            "<title>Hi</title><body><p>text</p></body>",
+        )
+
+    def test_render_repeated_slot(self):
+        template = Template("{{ Title }}|{{ Title }}")
+        self.assertEqual(template.render(Title="a"), "a|a")
+
+    def test_base_path_applied_to_static_parts(self):
+        template = Template(
+            '<link href="/index.css" /><img src="/a.png" />{{ Content }}',
+            "/blog/",
+        )
+        self.assertEqual(
+            template.render(Content='<a href="/x">x</a>'),
+            '<link href="/blog/index.css" /><img src="/blog/a.png" /><a href="/x">x</a>',
+        )
+
+    def test_unknown_slots_are_left_as_written(self):
+        template = Template('<a href="/x">{{ Title }}</a><script>{{ user }}</script>{{ Content }}', "/blog/")
+        expected = '<a href="/blog/x">a</a><script>{{ user }}</script>{{ Content }}'
+        self.assertEqual(template.render(Title="a"), expected)
+        out = io.StringIO()
+        template.write(out, Title="a")
+        self.assertEqual(out.getvalue(), expected)
+
+    def test_rewrite_base_path(self):
+        self.assertEqual(
+            rewrite_base_path('<a href="/x"><img src="/y"></a>', "/site/"),
+            '<a href="/site/x"><img src="/site/y"></a>',
+        )
+
+    def test_write_streams_callable_slots(self):
+        template = Template('<link href="/a.css" />{{ Title }}{{ Content }}', "/blog/")
+        out = io.StringIO()
+        template.write(out, Title="t", Content=lambda stream: stream.write("<p>body</p>"))
+        self.assertEqual(out.getvalue(), '<link href="/blog/a.css" />t<p>body</p>')
+
+    def test_base_path_rewriter(self):
+        self.assertIsNone(base_path_rewriter("/"))
+        rewrite_url = base_path_rewriter("/blog/")
+        self.assertEqual(rewrite_url("/x"), "/blog/x")
+        self.assertEqual(rewrite_url("https://example.com/"), "https://example.com/")
+        self.assertEqual(Template("", "/blog/").rewrite_url("/x"), "/blog/x")
+
+    def test_fingerprinted_assets(self):
+        assets = {"/index.css": "/index.abc.css", "/a.png": "/a.def.png"}
+        template = Template('<link href="/index.css" /><a href="/index.css.map">{{ Content }}', "/blog/", assets)
+        self.assertEqual(
+            template.render(Content=""),
+            '<link href="/blog/index.abc.css" /><a href="/blog/index.css.map">',
+        )
+        self.assertEqual(template.rewrite_url("/a.png"), "/blog/a.def.png")
+        self.assertEqual(Template("", "/", assets).rewrite_url("/a.png"), "/a.def.png")
+        self.assertNotEqual(template.assets_key, Template("", "/blog/").assets_key)
+
+    def test_minify_html(self):
+        html = """<!doctype html>
+<html>
+  <!-- note -->
+  <body>
+    <p>a  <b>b</b>
+      c</p>
+    <pre>
+  x   y
+</pre>
+    <span>s</span> <textarea> t </textarea>
+    <!--[if IE]><p>old</p><![endif]-->
+  </body>
+</html>
+"""
+        self.assertEqual(
+            minify_html(html),
+            "<!doctype html><html><body><p>a <b>b</b> c</p><pre>\n  x   y\n</pre>"
+            "<span>s</span> <textarea> t </textarea> <!--[if IE]><p>old</p><![endif]--></body></html>",
+        )
+
+    def test_minified_template(self):
+        text = '<html>\n  <head>\n    <link href="/a.css" />\n  </head>\n  <title> {{ Title }} </title>\n</html>\n'
+        template = Template(text, "/blog/", minify=True)
+        self.assertEqual(
+            template.render(Title="t"),
+            '<html><head><link href="/blog/a.css" /></head><title>t</title></html>',
+        )
+        minified = '<html><head><link href="/a.css" /></head><title>{{ Title }}</title></html>'
+        self.assertEqual(template.bytes_saved, len(text) - len(minified))
+        self.assertEqual(Template(text).bytes_saved, 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -20,6 +20,8 @@ class TextNode:
         url (str | None): Optional URL for links or image sources.
     """
 
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text: str, text_type: TextType, url: str | None = None) -> None:
         """Initializes a TextNode instance.
 
@@ -41,6 +43,8 @@ class TextNode:
             Returns:
                 bool: True if equal, False otherwise.
             """
+        if not isinstance(other, TextNode):
+            return NotImplemented
         return (
                 self.text_type == other.text_type
                 and self.text == other.text